@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# measures how long it takes for bubblesub to show and paint its window.
+#
+# the application is started offscreen several times with a generated
+# script (and optionally synthetic media made with ffmpeg); median phase
+# timings are saved as JSON so that they can be compared across commits.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('--lines', type=int, default=500)
+    parser.add_argument(
+        '--media', action='store_true',
+        help='generate synthetic video and audio with ffmpeg')
+    parser.add_argument(
+        '--duration', type=int, default=60,
+        help='length of the synthetic media in seconds')
+    parser.add_argument(
+        '--plugins', metavar='dir',
+        help='directory with plugin scripts to load (default: none)')
+    parser.add_argument('-o', '--output', help='where to save the report')
+    parser.add_argument(
+        '--compare', metavar='path', help='report to compare against')
+    return parser.parse_args()
+
+
+def ms_to_ass_time(ms):
+    return '{}:{:02d}:{:02d}.{:02d}'.format(
+        ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms // 10 % 100)
+
+
+def generate_script(path, line_count, video_path):
+    with path.open('w') as handle:
+        handle.write('[Script Info]\n')
+        handle.write('ScriptType: v4.00+\n')
+        handle.write('PlayResY: 288\n\n')
+        if video_path:
+            handle.write('[Aegisub Project Garbage]\n')
+            handle.write('Video File: {}\n'.format(video_path.name))
+            handle.write('Audio File: {}\n\n'.format(video_path.name))
+        handle.write('[Events]\n')
+        handle.write(
+            'Format: Layer, Start, End, Style, Name, '
+            'MarginL, MarginR, MarginV, Effect, Text\n')
+        for i in range(line_count):
+            handle.write(
+                'Dialogue: 0,{},{},Default,,0,0,0,,Line {} '
+                'with some text to render\n'.format(
+                    ms_to_ass_time(i * 2000),
+                    ms_to_ass_time(i * 2000 + 1500),
+                    i + 1))
+
+
+def generate_media(path, duration):
+    subprocess.run(
+        [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i',
+            'testsrc=duration={}:size=640x360:rate=24000/1001'.format(
+                duration),
+            '-f', 'lavfi', '-i',
+            'sine=frequency=440:duration={}'.format(duration),
+            '-c:v', 'libx264', '-preset', 'ultrafast',
+            '-c:a', 'aac', '-shortest',
+            str(path),
+        ],
+        check=True)
+
+
+def run_once(script_path, work_dir):
+    report_path = work_dir / 'report.json'
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [str(ROOT_DIR), env.get('PYTHONPATH')]))
+    env['XDG_CACHE_HOME'] = str(work_dir / 'cache')
+    # a throwaway configuration rather than --no-config, so that plugin
+    # loading is part of the measurement
+    env['XDG_CONFIG_HOME'] = str(work_dir / 'config')
+    subprocess.run(
+        [
+            sys.executable, '-m', 'bubblesub',
+            str(script_path),
+            '--startup-report', str(report_path),
+            '--quit-after-startup',
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True)
+    with report_path.open() as handle:
+        return json.load(handle)
+
+
+def summarize(reports):
+    phases = {}
+    for report in reports:
+        for name, duration in report['phases'].items():
+            phases.setdefault(name, []).append(duration)
+    return {
+        'phases': {
+            name: statistics.median(durations)
+            for name, durations in phases.items()
+        },
+        'total': statistics.median(report['total'] for report in reports),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=str(ROOT_DIR),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary, baseline=None):
+    rows = list(summary['phases'].items()) + [('total', summary['total'])]
+    for name, duration in rows:
+        line = '{:<24} {:8.3f} s'.format(name, duration)
+        if baseline:
+            if name == 'total':
+                old = baseline['total']
+            else:
+                old = baseline['phases'].get(name)
+            if old:
+                line += ' ({:+.1%})'.format(duration / old - 1)
+        print(line)
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir)
+        video_path = None
+        if args.media:
+            if not shutil.which('ffmpeg'):
+                print('ffmpeg not found', file=sys.stderr)
+                return 1
+            video_path = work_dir / 'media.mkv'
+            generate_media(video_path, args.duration)
+        script_path = work_dir / 'script.ass'
+        generate_script(script_path, args.lines, video_path)
+        scripts_dir = work_dir / 'config' / 'bubblesub' / 'scripts'
+        scripts_dir.mkdir(parents=True)
+        if args.plugins:
+            for path in Path(args.plugins).glob('*.py'):
+                shutil.copy(str(path), str(scripts_dir))
+
+        # the first run warms up the caches and isn't counted
+        run_once(script_path, work_dir)
+        reports = [run_once(script_path, work_dir) for _ in range(args.runs)]
+
+    summary = summarize(reports)
+    summary.update({
+        'commit': get_commit(),
+        'runs': args.runs,
+        'lines': args.lines,
+        'media': args.media,
+    })
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    print_summary(summary, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(summary, handle, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
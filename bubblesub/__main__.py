@@ -1,31 +1,46 @@
 #!/usr/bin/env python3
 import argparse
+import sys
 import bubblesub.opt
-import bubblesub.ui
+import bubblesub.util
 
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('file', nargs='?')
     parser.add_argument('--no-config', action='store_true')
+    parser.add_argument(
+        '--startup-report', metavar='path',
+        help='save startup phase timings as JSON once the window is painted')
+    parser.add_argument(
+        '--quit-after-startup', action='store_true',
+        help='quit as soon as the window is painted')
     return parser.parse_args()
 
 
 def main():
-    args = parse_args()
+    timer = bubblesub.util.PhaseTimer()
+    if sys.argv[1:2] == ['batch']:
+        import bubblesub.batch
+        sys.exit(bubblesub.batch.main(sys.argv[2:]))
 
-    opt = bubblesub.opt.Options()
+    args = parse_args()
 
     print('loading API...')
     from bubblesub.api import Api
+    timer.mark('loading API')
 
     print('loading commands...')
     from bubblesub import cmd as _
+    timer.mark('loading commands')
 
-    api = Api(opt)
+    api = Api(bubblesub.opt.Options())
+    timer.mark('creating API')
 
     print('loading UI...')
-    bubblesub.ui.run(api, args)
+    import bubblesub.ui.ui
+    timer.mark('loading UI')
+    bubblesub.ui.ui.run(api, args, timer)
 
 
 if __name__ == '__main__':
@@ -1,21 +1,36 @@
 import bubblesub.api.log
 import bubblesub.api.gui
+import bubblesub.api.cache
 import bubblesub.api.audio
 import bubblesub.api.video
 import bubblesub.api.subs
+import bubblesub.api.search
+import bubblesub.api.spell
 import bubblesub.api.undo
 import bubblesub.api.cmd
 
 
 class Api:
-    def __init__(self, opt):
+    def __init__(self, opt, headless=False):
         super().__init__()
         self.opt = opt
+        self.headless = headless
         self.log = bubblesub.api.log.LogApi()
         self.gui = bubblesub.api.gui.GuiApi(self)
+        self.cache = bubblesub.api.cache.CacheApi(self.opt)
         self.subs = bubblesub.api.subs.SubtitlesApi()
-        self.video = bubblesub.api.video.VideoApi(
-            self.subs, self.log, self.opt)
-        self.audio = bubblesub.api.audio.AudioApi(self.video, self.log)
+        if headless:
+            # no playback nor media analysis without a window
+            self.video = None
+            self.audio = None
+            self.spell = None
+        else:
+            self.video = bubblesub.api.video.VideoApi(
+                self.subs, self.log, self.opt, self.cache)
+            self.audio = bubblesub.api.audio.AudioApi(
+                self.video, self.log, self.cache)
+            self.spell = bubblesub.api.spell.SpellCheckApi(
+                self.subs, self.opt, self.cache)
         self.undo = bubblesub.api.undo.UndoApi(self.subs)
+        self.search = bubblesub.api.search.SearchApi(self.subs)
         self.cmd = bubblesub.api.cmd.CommandApi(self)
@@ -1,59 +1,156 @@
 import time
+import struct
 import threading
 import bubblesub.util
-import ffms
-import scipy.io.wavfile
+from bubblesub.api.envelope import EnvelopeProvider
 import numpy as np
 from PyQt5 import QtCore
 
 
 _LOADING = object()
-_SAMPLER_LOCK = threading.Lock()
+
+WAV_CHUNK_SIZE = 65536  # in frames
+WAV_FORMATS = {
+    'uint8': (np.dtype('u1'), 1),
+    'int16': (np.dtype('<i2'), 1),
+    'int32': (np.dtype('<i4'), 1),
+    'float32': (np.dtype('<f4'), 3),
+}
+
+
+def _convert_samples(samples, dtype):
+    if samples.dtype == dtype:
+        return samples
+    if samples.dtype.kind == 'f':
+        normalized = samples.astype(np.float64)
+    elif samples.dtype.kind == 'u':
+        normalized = (samples.astype(np.float64) - 128) / 128
+    else:
+        normalized = samples / float(1 << (8 * samples.dtype.itemsize - 1))
+    if dtype.kind == 'f':
+        return normalized.astype(dtype)
+    if dtype.kind == 'u':
+        return np.clip(normalized * 128 + 128, 0, 255).astype(dtype)
+    limit = 1 << (8 * dtype.itemsize - 1)
+    return np.clip(normalized * limit, -limit, limit - 1).astype(dtype)
+
+
+def _write_wav_header(handle, format_tag, channel_count, sample_rate,
+                      sample_width, frame_count):
+    block_align = channel_count * sample_width
+    data_size = frame_count * block_align
+    fmt_chunk = struct.pack(
+        '<HHIIHH',
+        format_tag,
+        channel_count,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        sample_width * 8)
+    extra_chunks = b''
+    if format_tag != 1:
+        # non-pcm formats need the cbSize field and a fact chunk
+        fmt_chunk += struct.pack('<H', 0)
+        extra_chunks = b'fact' + struct.pack('<II', 4, frame_count)
+    riff_size = 4 + 8 + len(fmt_chunk) + len(extra_chunks) + 8 + data_size
+    handle.write(b'RIFF' + struct.pack('<I', riff_size) + b'WAVE')
+    handle.write(b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk)
+    handle.write(extra_chunks)
+    handle.write(b'data' + struct.pack('<I', data_size))
+
+
+class AudioReadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.read_count = 0
+        self.sample_count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def average_time(self):
+        return self.total_time / max(1, self.read_count)
+
+    def add(self, sample_count, duration):
+        with self._lock:
+            self.read_count += 1
+            self.sample_count += sample_count
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+
+
+class AudioSourcePool:
+    # ffms audio sources aren't thread safe, so rather than serializing all
+    # reads, each thread decodes through its own source. all of them share
+    # the same index so opening a new one is cheap.
+    def __init__(self, path, track_number, index):
+        self._path = path
+        self._track_number = track_number
+        self._index = index
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._source_count = 0
+        self.stats = AudioReadStats()
+        self.properties = self._get_source().properties
+
+    @property
+    def source_count(self):
+        return self._source_count
+
+    def read(self, start_frame, count):
+        start_time = time.time()
+        audio_source = self._get_source()
+        audio_source.init_buffer(count)
+        samples = audio_source.get_audio(start_frame)
+        self.stats.add(count, time.time() - start_time)
+        return samples
+
+    def _get_source(self):
+        ffms = bubblesub.util.get_ffms()
+        audio_source = getattr(self._local, 'audio_source', None)
+        if audio_source is None:
+            audio_source = ffms.AudioSource(
+                str(self._path), self._track_number, self._index)
+            self._local.audio_source = audio_source
+            with self._lock:
+                self._source_count += 1
+        return audio_source
 
 
 class AudioSourceProviderContext(bubblesub.util.ProviderContext):
-    def __init__(self, log_api):
+    def __init__(self, log_api, media_index):
         super().__init__()
         self._log_api = log_api
+        self._media_index = media_index
 
     def work(self, task):
+        ffms = bubblesub.util.get_ffms()
         path = task
         self._log_api.info('audio/sampler: loading... ({})'.format(path))
 
-        path_hash = bubblesub.util.hash(path)
-        cache_name = f'index-{path_hash}-audio'
-        cache_path = bubblesub.util.get_cache_file_path(cache_name)
-
-        index = None
-        if cache_path.exists():
-            index = ffms.Index.read(
-                index_file=str(cache_path), source_file=str(path))
-            if not index.belongs_to_file(str(path)):
-                index = None
-
+        index = self._media_index.get(path)
         if not index:
-            indexer = ffms.Indexer(str(path))
-            index = indexer.do_indexing(-1)
-            index.write(str(cache_path))
-
+            return path, None
         track_number = index.get_first_indexed_track_of_type(
             ffms.FFMS_TYPE_AUDIO)
-        audio_source = ffms.AudioSource(str(path), track_number, index)
+        pool = AudioSourcePool(path, track_number, index)
         self._log_api.info('audio/sampler: loaded')
-        return audio_source
+        return path, pool
 
 
 class AudioSourceProvider(bubblesub.util.Provider):
-    def __init__(self, parent, log_api):
-        super().__init__(parent, AudioSourceProviderContext(log_api))
+    def __init__(self, parent, log_api, media_index):
+        super().__init__(
+            parent, AudioSourceProviderContext(log_api, media_index))
 
 
 class AudioApi(QtCore.QObject):
     view_changed = QtCore.pyqtSignal()
     selection_changed = QtCore.pyqtSignal()
     parsed = QtCore.pyqtSignal()
+    envelope_updated = QtCore.pyqtSignal()
 
-    def __init__(self, video_api, log_api):
+    def __init__(self, video_api, log_api, cache_api):
         super().__init__()
         self._min = 0
         self._max = 0
@@ -67,8 +164,17 @@ class AudioApi(QtCore.QObject):
         self._video_api.parsed.connect(self._video_parsed)
         self._video_api.max_pts_changed.connect(self._max_pts_changed)
         self._audio_source = None
-        self._audio_source_provider = AudioSourceProvider(self, self._log_api)
+        self._audio_source_provider = AudioSourceProvider(
+            self, self._log_api, self._video_api.media_index)
         self._audio_source_provider.finished.connect(self._got_audio_source)
+        self._envelope = None
+        self._envelope_provider = EnvelopeProvider(
+            self, self._log_api, cache_api, self)
+        self._envelope_provider.finished.connect(self._got_envelope)
+
+    @property
+    def path(self):
+        return self._video_api.path
 
     @property
     def min(self):
@@ -192,35 +298,99 @@ class AudioApi(QtCore.QObject):
         else:
             self.view(self._view_start + distance, self._view_end + distance)
 
+    @property
+    def envelope(self):
+        return self._envelope
+
+    @property
+    def read_stats(self):
+        self._wait_for_audio_source()
+        if not self._audio_source:
+            return AudioReadStats()
+        return self._audio_source.stats
+
     def get_samples(self, start_frame, count):
-        with _SAMPLER_LOCK:
-            self._wait_for_audio_source()
-            if not self._audio_source:
-                return np.zeros(count).reshape(
-                    (count, max(1, self.channel_count)))
-            if start_frame + count > self.sample_count:
-                count = self.sample_count - start_frame
-            self._audio_source.init_buffer(count)
-            return self._audio_source.get_audio(start_frame)
-
-    def save_wav(self, path_or_handle, start_pts, end_pts):
+        self._wait_for_audio_source()
+        audio_source = self._audio_source
+        if not audio_source:
+            return np.zeros(count).reshape(
+                (count, max(1, self.channel_count)))
+        if start_frame + count > self.sample_count:
+            count = self.sample_count - start_frame
+        return audio_source.read(start_frame, count)
+
+    def get_mono_samples(self, start_frame, count):
+        ffms = bubblesub.util.get_ffms()
+        samples = self.get_samples(start_frame, count)
+        samples = np.mean(samples, axis=1, dtype=np.float32)
+        sample_fmt = self.sample_format
+        if sample_fmt == ffms.FFMS_FMT_U8:
+            samples = (samples - 128) / 128.
+        elif sample_fmt == ffms.FFMS_FMT_S16:
+            samples /= 32768.
+        elif sample_fmt == ffms.FFMS_FMT_S32:
+            samples /= 2147483648.
+        return samples
+
+    def save_wav(self, path_or_handle, start_pts, end_pts, fmt=None):
+        # the span is decoded and written in fixed-size chunks so that the
+        # memory use doesn't depend on its length
+        ffms = bubblesub.util.get_ffms()
         start_frame = int(start_pts * self.sample_rate / 1000)
         end_frame = int(end_pts * self.sample_rate / 1000)
+        start_frame = max(0, min(start_frame, self.sample_count))
+        end_frame = max(start_frame, min(end_frame, self.sample_count))
         frame_count = end_frame - start_frame
 
-        samples = self.get_samples(start_frame, frame_count)
-        # increase compatibility with external programs
-        if samples.dtype.name in ('float32', 'float64'):
-            samples = (samples * (1 << 31)).astype(np.int32)
-        scipy.io.wavfile.write(path_or_handle, self.sample_rate, samples)
+        if fmt is None:
+            # integer sources keep their format; floats are converted to
+            # increase compatibility with external programs
+            fmt = {
+                ffms.FFMS_FMT_U8: 'uint8',
+                ffms.FFMS_FMT_S16: 'int16',
+            }.get(self.sample_format, 'int32')
+        dtype, format_tag = WAV_FORMATS[fmt]
+        channel_count = max(1, self.channel_count)
+
+        if hasattr(path_or_handle, 'write'):
+            self._write_wav(
+                path_or_handle, start_frame, frame_count,
+                dtype, format_tag, channel_count)
+        else:
+            with open(path_or_handle, 'wb') as handle:
+                self._write_wav(
+                    handle, start_frame, frame_count,
+                    dtype, format_tag, channel_count)
+
+    def _write_wav(
+            self, handle, start_frame, frame_count,
+            dtype, format_tag, channel_count):
+        _write_wav_header(
+            handle,
+            format_tag,
+            channel_count,
+            self.sample_rate,
+            dtype.itemsize,
+            frame_count)
+        end_frame = start_frame + frame_count
+        for chunk_start in range(start_frame, end_frame, WAV_CHUNK_SIZE):
+            samples = self.get_samples(
+                chunk_start, min(WAV_CHUNK_SIZE, end_frame - chunk_start))
+            samples = _convert_samples(samples, dtype)
+            handle.write(np.ascontiguousarray(samples).tobytes())
 
     def _video_parsed(self):
         self._min = 0
         self._max = 0
         self.zoom_view(1, 0.5)  # emits view_changed
-        self._audio_source = _LOADING
+        self._envelope = None
+        self._envelope_provider.clear_tasks()
+        self.envelope_updated.emit()
         if self._video_api.path:
+            self._audio_source = _LOADING
             self._audio_source_provider.schedule_task(self._video_api.path)
+        else:
+            self._audio_source = None
 
     def _max_pts_changed(self):
         self._min = 0
@@ -228,8 +398,20 @@ class AudioApi(QtCore.QObject):
         self.zoom_view(1, 0.5)  # emits view_changed
 
     def _got_audio_source(self, result):
-        self._audio_source = result
+        path, audio_source = result
+        if path != self._video_api.path:
+            return
+        self._audio_source = audio_source
         self.parsed.emit()
+        if audio_source:
+            self._envelope_provider.schedule_task(path)
+
+    def _got_envelope(self, result):
+        path, envelope = result
+        if path != self._video_api.path:
+            return
+        self._envelope = envelope
+        self.envelope_updated.emit()
 
     def _wait_for_audio_source(self):
         while self._audio_source is _LOADING:
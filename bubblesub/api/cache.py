@@ -0,0 +1,120 @@
+import os
+import pickle
+import hashlib
+import itertools
+from pathlib import Path
+import numpy as np
+import xdg
+
+
+_SAMPLE_SIZE = 64 * 1024
+_SAMPLE_COUNT = 4
+
+
+class CacheApi:
+    def __init__(self, opt_api):
+        self._opt_api = opt_api
+
+    @property
+    def location(self):
+        return Path(xdg.XDG_CACHE_HOME) / 'bubblesub'
+
+    @property
+    def max_size(self):
+        return self._opt_api.general['cache']['max_size'] * 1024 * 1024
+
+    @property
+    def size(self):
+        return sum(size for _path, size, _mtime in self._get_entries())
+
+    @property
+    def file_count(self):
+        return len(self._get_entries())
+
+    def get_file_key(self, path):
+        # the path alone says nothing about the content - files get replaced
+        # and moved around. hashing entire videos is too slow though, so only
+        # a few evenly spaced chunks are sampled.
+        path = Path(path)
+        stat = path.stat()
+        digest = hashlib.md5()
+        digest.update(f'{stat.st_size}:{stat.st_mtime_ns}'.encode('ascii'))
+        with path.open('rb') as handle:
+            for i in range(_SAMPLE_COUNT):
+                handle.seek(
+                    max(0, stat.st_size - _SAMPLE_SIZE)
+                    * i // (_SAMPLE_COUNT - 1))
+                digest.update(handle.read(_SAMPLE_SIZE))
+        return digest.hexdigest()
+
+    def get_file_path(self, cache_name):
+        return self.location / (cache_name + '.dat')
+
+    def touch(self, cache_name):
+        try:
+            os.utime(self.get_file_path(cache_name))
+        except FileNotFoundError:
+            pass
+
+    def load(self, cache_name):
+        cache_file = self.get_file_path(cache_name)
+        if cache_file.exists():
+            self.touch(cache_name)
+            with cache_file.open(mode='rb') as handle:
+                return pickle.load(handle)
+        return None
+
+    def save(self, cache_name, data):
+        cache_file = self.get_file_path(cache_name)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with cache_file.open(mode='wb') as handle:
+            pickle.dump(data, handle)
+        self.evict()
+
+    def load_array(self, cache_name):
+        cache_file = self.get_file_path(cache_name)
+        if cache_file.exists():
+            self.touch(cache_name)
+            return np.load(str(cache_file), mmap_mode='r')
+        return None
+
+    def save_array(self, cache_name, array):
+        cache_file = self.get_file_path(cache_name)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with cache_file.open(mode='wb') as handle:
+            np.save(handle, array)
+        self.evict()
+
+    def evict(self):
+        # least recently used files go first; the most recent one stays even
+        # if it doesn't fit on its own.
+        entries = sorted(self._get_entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _path, size, _mtime in entries)
+        for path, size, _mtime in entries[:-1]:
+            if total_size <= self.max_size:
+                break
+            self._unlink(path)
+            total_size -= size
+
+    def purge(self):
+        for path, _size, _mtime in self._get_entries():
+            self._unlink(path)
+
+    def _get_entries(self):
+        entries = []
+        if self.location.exists():
+            for path in itertools.chain(
+                    self.location.glob('*.dat'),
+                    self.location.glob('profiles/*.prof')):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _unlink(self, path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,6 +1,13 @@
 import asyncio
+import bisect
+import cProfile
+import fnmatch
+import io
+import pstats
+import re
 import time
 import sys
+import types
 import importlib.util
 import bubblesub.util
 from PyQt5 import QtCore
@@ -33,6 +40,66 @@ class BaseCommand:
         self.api.log.error('cmd/{}: {}'.format(self.name, text))
 
 
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (.001, .005, .01, .05, .1, .5, 1, 5, 10, float('inf'))
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.run_count = 0
+        self.error_count = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+
+    @property
+    def average_time(self):
+        return self.total_time / max(1, self.run_count)
+
+    def add(self, duration, success):
+        self.run_count += 1
+        if not success:
+            self.error_count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def to_dict(self):
+        return {
+            'run_count': self.run_count,
+            'error_count': self.error_count,
+            'total_time': self.total_time,
+            'average_time': self.average_time,
+            'max_time': self.max_time,
+            'histogram': {
+                str(bound): count
+                for bound, count in zip(LATENCY_BUCKETS, self.histogram)
+            },
+        }
+
+
+@types.coroutine
+def _profile_steps(coro, profiler):
+    # the profiler only runs while the command itself does; whatever else
+    # runs on the event loop while it awaits isn't charged to it
+    value, error = None, None
+    while True:
+        profiler.enable()
+        try:
+            if error is None:
+                awaited = coro.send(value)
+            else:
+                awaited = coro.throw(error)
+        except StopIteration as ex:
+            return ex.value
+        finally:
+            profiler.disable()
+        try:
+            value, error = (yield awaited), None
+        except BaseException as ex:
+            value, error = None, ex
+
+
 class CommandApi(QtCore.QObject):
     core_registry = {}
     plugin_registry = {}
@@ -42,25 +109,92 @@ class CommandApi(QtCore.QObject):
         super().__init__()
         self._api = api
         self._thread = None
+        self._metrics = {}
+        self._profile_count = 0
+        self._profile_pattern = None
+        self._profiler = None
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def is_profiling(self):
+        return self._profile_count > 0 or self._profile_pattern is not None
+
+    def start_profiling(self, count=0, pattern=None):
+        # profiles either the next few commands or all the commands whose
+        # name matches given shell-style pattern, until stopped
+        self._profile_count = count
+        self._profile_pattern = pattern
+
+    def stop_profiling(self):
+        self._profile_count = 0
+        self._profile_pattern = None
+
+    def _should_profile(self, cmd):
+        # only one profiler can be active at a time
+        if self._profiler:
+            return False
+        if self._profile_pattern is not None:
+            return fnmatch.fnmatch(cmd.name, self._profile_pattern)
+        if self._profile_count > 0:
+            self._profile_count -= 1
+            return True
+        return False
+
+    def _save_profile(self, cmd, profiler):
+        path = (
+            self._api.cache.location / 'profiles' / '{}-{}.prof'.format(
+                re.sub(r'\W+', '-', cmd.name),
+                time.strftime('%Y%m%d-%H%M%S')))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(15)
+        self._api.log.info('cmd/{}: profile saved to {}\n{}'.format(
+            cmd.name, path, stream.getvalue().strip()))
 
     def run(self, cmd):
-        if not cmd.enabled():
+        asyncio.ensure_future(self.execute(cmd))
+
+    async def execute(self, cmd):
+        try:
+            enabled = cmd.enabled()
+        except Exception as ex:
+            self._api.log.error('cmd/{}: error: {}'.format(cmd.name, ex))
+            return False
+        if not enabled:
             self._api.log.info(
                 'cmd/{}: not available right now'.format(cmd.name))
-            return
-
-        async def run():
-            self._api.log.info('cmd/{}: running...'.format(cmd.name))
-            start_time = time.time()
-            try:
+            return False
+
+        self._api.log.info('cmd/{}: running...'.format(cmd.name))
+        profiler = None
+        if self._should_profile(cmd):
+            profiler = self._profiler = cProfile.Profile()
+        start_time = time.time()
+        success = True
+        try:
+            if profiler:
+                await _profile_steps(cmd.run(), profiler)
+            else:
                 await cmd.run()
-            except Exception as ex:
-                self._api.log.info('cmd/{}: error: {}'.format(cmd.name, ex))
-            end_time = time.time()
-            self._api.log.info('cmd/{}: ran in {:.02f} s'.format(
-                cmd.name, end_time - start_time))
-
-        asyncio.ensure_future(run())
+        except Exception as ex:
+            self._api.log.info('cmd/{}: error: {}'.format(cmd.name, ex))
+            success = False
+        finally:
+            self._profiler = None
+        end_time = time.time()
+        if profiler:
+            self._save_profile(cmd, profiler)
+        self._api.log.info('cmd/{}: ran in {:.02f} s'.format(
+            cmd.name, end_time - start_time))
+        self._metrics.setdefault(cmd.name, CommandMetrics()).add(
+            end_time - start_time, success)
+        return success
 
     def get(self, name, args):
         ret = self.plugin_registry.get(name)
@@ -0,0 +1,136 @@
+import numpy as np
+import bubblesub.util
+
+
+BUCKET_SIZE = 256
+LEVEL_FACTOR = 4
+CHUNK_SIZE = BUCKET_SIZE * 4096
+
+_MIN = 0
+_MAX = 1
+_RMS = 2
+
+
+class Envelope:
+    # peak envelope of the audio track. the finest level keeps min, max and
+    # rms of every BUCKET_SIZE samples, each next level is LEVEL_FACTOR times
+    # coarser, so any zoom level can be drawn by reducing a handful of
+    # buckets per pixel.
+    def __init__(self, sample_rate, base_level):
+        self.sample_rate = sample_rate
+        self.levels = [base_level]
+        while len(self.levels[-1]) > LEVEL_FACTOR:
+            self.levels.append(_reduce_level(self.levels[-1]))
+
+    @staticmethod
+    def get_bucket_size(level_idx):
+        return BUCKET_SIZE * LEVEL_FACTOR ** level_idx
+
+    def pts_to_bucket(self, pts, level_idx=0):
+        return int(
+            pts * self.sample_rate / 1000 / self.get_bucket_size(level_idx))
+
+    def bucket_to_pts(self, bucket, level_idx=0):
+        return bucket * self.get_bucket_size(level_idx) * 1000 / (
+            self.sample_rate)
+
+    def find_quietest_pts(self, start_pts, end_pts):
+        level = self.levels[0]
+        start = max(0, self.pts_to_bucket(start_pts))
+        end = min(len(level), self.pts_to_bucket(end_pts) + 1)
+        if start >= end:
+            return None
+        bucket = start + int(np.argmin(level[start:end, _RMS]))
+        # the middle of an edge bucket can fall outside of the range
+        return min(max(self.bucket_to_pts(bucket + .5), start_pts), end_pts)
+
+    def get_columns(self, start_pts, end_pts, count):
+        samples_per_column = (
+            (end_pts - start_pts) * self.sample_rate / 1000 / max(1, count))
+        level_idx = 0
+        while (
+                level_idx + 1 < len(self.levels)
+                and self.get_bucket_size(level_idx + 1) <= samples_per_column):
+            level_idx += 1
+        level = self.levels[level_idx]
+
+        edges = np.linspace(start_pts, end_pts, count + 1)
+        edges = edges * self.sample_rate / 1000
+        edges /= self.get_bucket_size(level_idx)
+        outside = (edges[:-1] < 0) | (edges[:-1] >= len(level))
+        idx = np.clip(edges.astype(np.int64), 0, len(level) - 1)
+
+        mins = np.minimum.reduceat(level[:, _MIN], idx)[:-1]
+        maxs = np.maximum.reduceat(level[:, _MAX], idx)[:-1]
+        rms = np.sqrt(
+            np.add.reduceat(np.square(level[:, _RMS]), idx)[:-1]
+            / np.maximum(1, np.diff(idx)))
+        mins[outside] = 0
+        maxs[outside] = 0
+        rms[outside] = 0
+        return mins, maxs, rms
+
+
+def _reduce_level(level):
+    padding = -len(level) % LEVEL_FACTOR
+    if padding:
+        level = np.concatenate([level, np.repeat(level[-1:], padding, 0)])
+    groups = level.reshape(-1, LEVEL_FACTOR, 3)
+    result = np.empty((len(groups), 3), dtype=np.float32)
+    result[:, _MIN] = groups[:, :, _MIN].min(axis=1)
+    result[:, _MAX] = groups[:, :, _MAX].max(axis=1)
+    result[:, _RMS] = np.sqrt(np.mean(np.square(groups[:, :, _RMS]), axis=1))
+    return result
+
+
+class EnvelopeProviderContext(bubblesub.util.ProviderContext):
+    def __init__(self, log_api, cache_api, audio_api):
+        super().__init__()
+        self._log_api = log_api
+        self._cache_api = cache_api
+        self._audio_api = audio_api
+
+    def work(self, task):
+        path = task
+        cache_name = 'envelope-{}'.format(self._cache_api.get_file_key(path))
+
+        base_level = self._cache_api.load_array(cache_name)
+        if base_level is None:
+            self._log_api.info('audio/envelope: computing...')
+            base_level = self._compute_base_level(path)
+            if base_level is None:
+                return path, None
+            self._cache_api.save_array(cache_name, base_level)
+            self._log_api.info('audio/envelope: computed')
+
+        return path, Envelope(self._audio_api.sample_rate, base_level)
+
+    def _compute_base_level(self, path):
+        sample_count = self._audio_api.sample_count
+        bucket_count = -(-sample_count // BUCKET_SIZE)
+        if not bucket_count:
+            return None
+        result = np.zeros((bucket_count, 3), dtype=np.float32)
+
+        for chunk_start in range(0, sample_count, CHUNK_SIZE):
+            if path != self._audio_api.path:
+                return None
+            samples = self._audio_api.get_mono_samples(
+                chunk_start, CHUNK_SIZE)
+            padding = -len(samples) % BUCKET_SIZE
+            if padding:
+                samples = np.pad(samples, (0, padding), 'constant')
+            buckets = samples.reshape(-1, BUCKET_SIZE)
+            first_bucket = chunk_start // BUCKET_SIZE
+            chunk = result[first_bucket:first_bucket + len(buckets)]
+            chunk[:, _MIN] = buckets.min(axis=1)
+            chunk[:, _MAX] = buckets.max(axis=1)
+            chunk[:, _RMS] = np.sqrt(np.mean(np.square(buckets), axis=1))
+
+        return result
+
+
+class EnvelopeProvider(bubblesub.util.Provider):
+    def __init__(self, parent, log_api, cache_api, audio_api):
+        super().__init__(
+            parent, EnvelopeProviderContext(log_api, cache_api, audio_api))
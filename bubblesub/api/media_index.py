@@ -0,0 +1,91 @@
+import threading
+import bubblesub.util
+from PyQt5 import QtCore
+
+
+class MediaIndex(QtCore.QObject):
+    indexing_progressed = QtCore.pyqtSignal(int)
+    indexing_finished = QtCore.pyqtSignal()
+
+    # audio and video providers work on separate threads, but they need the
+    # same index. whoever asks first indexes the file in a single demuxing
+    # pass, the other one waits for the result.
+    def __init__(self, log_api, cache_api):
+        super().__init__()
+        self._log_api = log_api
+        self._cache_api = cache_api
+        self._lock = threading.Lock()
+        self._path = None
+        self._index = None
+        self._current_path = None
+
+    @property
+    def current_path(self):
+        return self._current_path
+
+    def set_current_path(self, path):
+        # indexing anything else than the current file gets cancelled
+        self._current_path = path
+
+    def get(self, path):
+        with self._lock:
+            if self._path != path:
+                self._index = None
+                self._index = self._load(path)
+                self._path = path if self._index else None
+            return self._index
+
+    def _load(self, path):
+        ffms = bubblesub.util.get_ffms()
+        if path != self._current_path:
+            return None
+
+        cache_name = 'index-{}'.format(self._cache_api.get_file_key(path))
+        cache_path = self._cache_api.get_file_path(cache_name)
+
+        if cache_path.exists():
+            index = ffms.Index.read(
+                index_file=str(cache_path), source_file=str(path))
+            if index.belongs_to_file(str(path)):
+                self._cache_api.touch(cache_name)
+                return index
+
+        self._log_api.info('index: indexing... ({})'.format(path))
+        last_percent = -1
+
+        def progress(current, total, _private):
+            nonlocal last_percent
+            if path != self._current_path:
+                return 1
+            percent = current * 100 // max(1, total)
+            if percent != last_percent:
+                self.indexing_progressed.emit(percent)
+                if percent // 10 != last_percent // 10:
+                    self._log_api.info('index: {}%'.format(percent))
+            last_percent = percent
+            return 0
+
+        indexer = ffms.Indexer(str(path))
+
+        # only the track that is going to be played back is worth indexing
+        index_mask = 0
+        for track_number, track_info in enumerate(indexer.track_info_list):
+            if track_info.type == ffms.FFMS_TYPE_AUDIO:
+                index_mask = 1 << track_number
+                break
+
+        try:
+            index = indexer.do_indexing(index_mask, ic=progress)
+        except ffms.Error:
+            if path == self._current_path:
+                raise
+            self._log_api.info('index: cancelled ({})'.format(path))
+            return None
+        finally:
+            self.indexing_finished.emit()
+
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        index.write(str(cache_path))
+        self._cache_api.evict()
+        self._log_api.info('index: indexed')
+        return index
@@ -0,0 +1,193 @@
+import json
+import re
+from collections import deque
+
+
+class Rule:
+    def __init__(
+            self, find, replace, regex=False, case_sensitive=True, name=None):
+        self.name = name or find
+        if not find:
+            raise ValueError('Rule {!r} has nothing to find'.format(self.name))
+        self.find = find
+        self.replace = replace
+        self.regex = regex
+        self.case_sensitive = case_sensitive
+
+    def expand(self, match):
+        # replacements of plain text rules are plain text too
+        if self.regex:
+            return match.expand(self.replace)
+        return self.replace
+
+
+def _compiles(pattern):
+    try:
+        re.compile(pattern)
+    except re.error:
+        return False
+    return True
+
+
+class Automaton:
+    # aho-corasick automaton matching many literals in one pass over the
+    # text
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for word_idx, word in enumerate(words):
+            state = 0
+            for char in word:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((word_idx, len(word)))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += (
+                    self._output[self._fail[next_state]])
+
+    def find_all(self, text):
+        # yields (start, end, word index) of every occurrence, overlapping
+        # ones included
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for word_idx, length in self._output[state]:
+                yield pos + 1 - length, pos + 1, word_idx
+
+
+class RuleSet:
+    # case sensitive literals go to the automaton, everything else is
+    # combined into a single regex with one named group per rule. the
+    # earliest match wins; on ties the longer one does.
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._literal_rules = [
+            rule
+            for rule in self.rules
+            if not rule.regex and rule.case_sensitive
+        ]
+        self._regex_rules = [
+            rule
+            for rule in self.rules
+            if rule.regex or not rule.case_sensitive
+        ]
+
+        self._automaton = Automaton(
+            [rule.find for rule in self._literal_rules])
+
+        # patterns that refer to their own groups can't be merged with the
+        # others as the group numbers or names would clash, and neither can
+        # the ones with global inline flags; they get searched on their own
+        self._streams = []
+        self._rule_regexes = []
+        parts = []
+        for i, rule in enumerate(self._regex_rules):
+            pattern = rule.find if rule.regex else re.escape(rule.find)
+            flags = 0 if rule.case_sensitive else re.I
+            try:
+                regex = re.compile(pattern, flags=flags)
+            except re.error as ex:
+                raise ValueError(
+                    'Rule {!r} has an invalid pattern: {}'.format(
+                        rule.name, ex))
+            self._rule_regexes.append(regex)
+            if rule.case_sensitive:
+                part = '(?P<_r{}>{})'.format(i, pattern)
+            else:
+                part = '(?P<_r{}>(?i:{}))'.format(i, pattern)
+            if (
+                    regex.groupindex
+                    or re.search(r'\\\d|\(\?\(', pattern)
+                    or not _compiles(part)):
+                self._streams.append((regex, i))
+            else:
+                parts.append(part)
+        if parts:
+            self._streams.append((re.compile('|'.join(parts)), None))
+
+    @staticmethod
+    def load(path):
+        with open(path, 'r') as handle:
+            return RuleSet(Rule(**item) for item in json.load(handle))
+
+    def apply(self, text):
+        # returns the new text and how many replacements were made
+        literal_matches = sorted(
+            self._automaton.find_all(text),
+            key=lambda match: (match[0], match[0] - match[1]))
+        literal_idx = 0
+        regex_matches = [None] * len(self._streams)
+
+        result = []
+        count = 0
+        pos = 0
+        while pos <= len(text):
+            while (
+                    literal_idx < len(literal_matches)
+                    and literal_matches[literal_idx][0] < pos):
+                literal_idx += 1
+            best = (
+                literal_matches[literal_idx]
+                if literal_idx < len(literal_matches)
+                else None)
+            best_stream = None
+
+            for stream_idx, (regex, _rule_idx) in enumerate(self._streams):
+                match = regex_matches[stream_idx]
+                if match is None or match.start() < pos:
+                    match = regex.search(text, pos)
+                    regex_matches[stream_idx] = match
+                if match and (
+                        best is None
+                        or match.start() < best[0]
+                        or (
+                            match.start() == best[0]
+                            and match.end() > best[1])):
+                    best = (match.start(), match.end(), match)
+                    best_stream = stream_idx
+
+            if best is None:
+                break
+
+            start, end, rule_idx = best
+            if best_stream is None:
+                replacement = self._literal_rules[rule_idx].replace
+            else:
+                match = best[2]
+                rule_idx = self._streams[best_stream][1]
+                if rule_idx is None:
+                    rule_idx = int(match.lastgroup[2:])
+                    match = self._rule_regexes[rule_idx].match(text, start)
+                replacement = self._regex_rules[rule_idx].expand(match)
+                regex_matches[best_stream] = None
+
+            result.append(text[pos:start])
+            result.append(replacement)
+            count += 1
+            if end == start:
+                # empty match; keep going from the next character
+                result.append(text[end:end + 1])
+                end += 1
+            pos = end
+
+        result.append(text[pos:])
+        return ''.join(result), count
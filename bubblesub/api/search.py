@@ -0,0 +1,275 @@
+import enum
+import re
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+import bubblesub.util
+from PyQt5 import QtCore
+
+
+NGRAM_SIZE = 3
+FIND_ALL_CHUNK_SIZE = 500
+SNIPPET_CONTEXT = 30
+
+
+class SearchMode(enum.IntEnum):
+    Text = 1
+    Note = 2
+    Actor = 3
+    Style = 4
+
+
+def get_subject_attr(mode):
+    if mode == SearchMode.Text:
+        return 'text'
+    elif mode == SearchMode.Note:
+        return 'note'
+    elif mode == SearchMode.Actor:
+        return 'actor'
+    elif mode == SearchMode.Style:
+        return 'style'
+    else:
+        assert False, 'Invalid mode'
+
+
+# casefolding alone keeps the dotted and dotless i apart, while re.I
+# matches them with plain i, so they're folded together as well. dropping
+# the combining dot from both the index and the query keeps substrings
+# intact.
+_FOLD_FIXES = str.maketrans({'\u0307': None, '\u0131': 'i'})
+
+
+def _normalize(text):
+    # every pair of characters that re.I considers equal must normalize the
+    # same way, or the index would rule out lines that do match
+    return text.casefold().translate(_FOLD_FIXES)
+
+
+def _get_ngrams(text):
+    return {
+        text[i:i + NGRAM_SIZE]
+        for i in range(len(text) - NGRAM_SIZE + 1)
+    }
+
+
+def _get_required_literals(parsed):
+    # returns runs of characters that every match must contain. anything
+    # that isn't certain to be part of the match (alternatives, optional
+    # repetitions, character classes...) ends the current run.
+    runs = []
+    run = ''
+    for op, arg in parsed:
+        if op == sre_parse.LITERAL:
+            run += chr(arg)
+            continue
+        if run:
+            runs.append(run)
+            run = ''
+        if op == sre_parse.SUBPATTERN:
+            runs += _get_required_literals(arg[-1])
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            min_count, _max_count, subpattern = arg
+            if min_count >= 1:
+                runs += _get_required_literals(subpattern)
+    if run:
+        runs.append(run)
+    return runs
+
+
+class FindAllProviderContext(bubblesub.util.ProviderContext):
+    def work(self, task):
+        generation, regex, chunk = task
+        hits = []
+        for idx, subject in chunk:
+            for match in regex.finditer(subject):
+                snippet = subject[
+                    max(0, match.start() - SNIPPET_CONTEXT):
+                    match.end() + SNIPPET_CONTEXT]
+                hits.append((idx, match.start(), match.end(), snippet))
+        return generation, hits
+
+
+class FindAllProvider(bubblesub.util.Provider):
+    def __init__(self, parent):
+        super().__init__(parent, FindAllProviderContext())
+
+
+class SearchApi(QtCore.QObject):
+    found = QtCore.pyqtSignal(list)
+    find_all_finished = QtCore.pyqtSignal()
+
+    # trigram index of the searchable subtitle fields. it is built on first
+    # use and then kept up to date from the subtitle list signals. entries
+    # are keyed by the subtitle objects, so insertions and removals don't
+    # invalidate anything else.
+    def __init__(self, subs_api):
+        super().__init__()
+        self._subs_api = subs_api
+        self._index = None
+        self._entries = {}
+        self._changing = None
+        self._find_all_provider = None
+        self._find_all_generation = 0
+        self._find_all_pending = 0
+
+        lines = subs_api.lines
+        lines.items_inserted.connect(self._lines_inserted)
+        lines.items_about_to_be_removed.connect(
+            self._lines_about_to_be_removed)
+        lines.item_about_to_change.connect(self._line_about_to_change)
+        lines.item_changed.connect(self._line_changed)
+        lines.items_changed.connect(self._lines_changed)
+
+    @staticmethod
+    def compile(text, case_sensitive, use_regexes):
+        return re.compile(
+            text if use_regexes else re.escape(text),
+            flags=(0 if case_sensitive else re.I))
+
+    def get_candidate_indexes(self, regex, mode):
+        # returns indexes of the lines that might match the regex, or None
+        # if the index can't narrow them down
+        ngrams = set()
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+        except Exception:
+            return None
+        for literal in _get_required_literals(parsed):
+            ngrams |= _get_ngrams(_normalize(literal))
+        if not ngrams:
+            return None
+
+        index = self._get_index()[mode]
+        postings = sorted(
+            (index.get(ngram, set()) for ngram in ngrams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        if not candidates:
+            return set()
+
+        return {
+            idx
+            for idx, sub in enumerate(self._subs_api.lines)
+            if sub in candidates
+        }
+
+    @property
+    def is_finding_all(self):
+        return self._find_all_pending > 0
+
+    def find_all(self, regex, mode):
+        # matching runs on a worker thread in chunks and the hits are
+        # reported with the found signal as each chunk is done. starting
+        # another search cancels the previous one.
+        self.cancel_find_all()
+        if self._find_all_provider is None:
+            self._find_all_provider = FindAllProvider(self)
+            self._find_all_provider.finished.connect(self._got_find_all_hits)
+
+        candidates = self.get_candidate_indexes(regex, mode)
+        if candidates is None:
+            candidates = range(len(self._subs_api.lines))
+        attr = get_subject_attr(mode)
+        subjects = [
+            (idx, getattr(self._subs_api.lines[idx], attr))
+            for idx in sorted(candidates)
+        ]
+        chunks = [
+            subjects[i:i + FIND_ALL_CHUNK_SIZE]
+            for i in range(0, len(subjects), FIND_ALL_CHUNK_SIZE)
+        ]
+        if not chunks:
+            self.find_all_finished.emit()
+            return
+
+        # the provider queue is LIFO, so the first chunk goes in last
+        self._find_all_pending = len(chunks)
+        for chunk in reversed(chunks):
+            self._find_all_provider.schedule_task(
+                (self._find_all_generation, regex, chunk))
+
+    def cancel_find_all(self):
+        self._find_all_generation += 1
+        self._find_all_pending = 0
+        if self._find_all_provider is not None:
+            self._find_all_provider.clear_tasks()
+
+    def _got_find_all_hits(self, result):
+        generation, hits = result
+        if generation != self._find_all_generation:
+            return
+        if hits:
+            self.found.emit(hits)
+        self._find_all_pending -= 1
+        if not self._find_all_pending:
+            self.find_all_finished.emit()
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = {mode: {} for mode in SearchMode}
+            self._entries = {}
+            for sub in self._subs_api.lines:
+                self._add(sub)
+        return self._index
+
+    def _add(self, sub):
+        entry = {}
+        for mode in SearchMode:
+            ngrams = _get_ngrams(
+                _normalize(getattr(sub, get_subject_attr(mode))))
+            entry[mode] = ngrams
+            index = self._index[mode]
+            for ngram in ngrams:
+                index.setdefault(ngram, set()).add(sub)
+        self._entries[sub] = entry
+
+    def _discard(self, sub):
+        entry = self._entries.pop(sub, None)
+        if not entry:
+            return
+        for mode, ngrams in entry.items():
+            index = self._index[mode]
+            for ngram in ngrams:
+                posting = index.get(ngram)
+                if posting is not None:
+                    posting.discard(sub)
+                    if not posting:
+                        del index[ngram]
+
+    def _lines_inserted(self, idx, count):
+        if self._index is not None:
+            for sub in self._subs_api.lines[idx:idx + count]:
+                self._add(sub)
+
+    def _lines_about_to_be_removed(self, idx, count):
+        if count == len(self._subs_api.lines):
+            # loading another file; rebuild lazily when it's needed
+            self._index = None
+            self._entries = {}
+        elif self._index is not None:
+            for sub in self._subs_api.lines[idx:idx + count]:
+                self._discard(sub)
+
+    def _line_about_to_change(self, idx):
+        # the line might get replaced with another object altogether
+        self._changing = self._subs_api.lines[idx]
+
+    def _line_changed(self, idx):
+        if self._index is not None:
+            sub = self._subs_api.lines[idx]
+            if self._changing is not None and self._changing is not sub:
+                self._discard(self._changing)
+            self._discard(sub)
+            self._add(sub)
+        self._changing = None
+
+    def _lines_changed(self, indexes):
+        if self._index is not None:
+            for idx in indexes:
+                sub = self._subs_api.lines[idx]
+                self._discard(sub)
+                self._add(sub)
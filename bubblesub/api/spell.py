@@ -0,0 +1,364 @@
+import asyncio
+import bubblesub.util
+from PyQt5 import QtCore
+
+
+CHECK_CHUNK_SIZE = 200
+SAVE_DELAY = 5000
+
+
+def _tokenize(text):
+    import regex
+    text = regex.sub(
+        r'\\[Nnh]',
+        '  ',  # two spaces so that matches mantain position in text
+        text)
+    return [
+        (match.start(), match.end(), match.group(0))
+        for match in regex.finditer(r'\p{L}[\p{L}\p{P}]*\p{L}|\p{L}', text)
+    ]
+
+
+class SpellCheckProviderContext(bubblesub.util.ProviderContext):
+    def __init__(self, language, verdicts, cache_api):
+        super().__init__()
+        self._language = language
+        self._verdicts = verdicts
+        self._cache_api = cache_api
+        self._dict = None
+        self._error = None
+
+    def start_work(self):
+        try:
+            import enchant
+            self._dict = enchant.Dict(self._language)
+        except Exception as ex:
+            self._error = str(ex)
+
+    def work(self, task):
+        # failures are sent back rather than raised, so that the api
+        # doesn't keep waiting for results that would never come
+        if self._error:
+            return 'error', task, self._error
+        try:
+            return self._work(task)
+        except Exception as ex:
+            return 'error', task, str(ex)
+
+    def _work(self, task):
+        kind, *args = task
+        if kind == 'save':
+            # pickling and evicting the cache is too slow for the gui thread
+            cache_name, verdicts = args
+            self._cache_api.save(cache_name, verdicts)
+            return (kind,)
+        if kind == 'add':
+            word, = args
+            self._dict.add(word)
+            self._verdicts[word] = True
+            return kind, word
+        if kind == 'suggest':
+            word, = args
+            return kind, word, self._dict.suggest(word)
+
+        # only the words that were never seen before reach the dictionary
+        generation, lines = args
+        results = []
+        new_verdicts = {}
+        for sub, text in lines:
+            tokens = _tokenize(text)
+            for _start, _end, word in tokens:
+                if word not in self._verdicts:
+                    verdict = self._dict.check(word)
+                    self._verdicts[word] = verdict
+                    new_verdicts[word] = verdict
+            results.append((sub, text, tokens))
+        return kind, generation, results, new_verdicts
+
+
+class SpellCheckProvider(bubblesub.util.Provider):
+    def __init__(self, parent, language, verdicts, cache_api):
+        super().__init__(
+            parent,
+            SpellCheckProviderContext(language, verdicts, cache_api))
+
+
+class SpellCheckApi(QtCore.QObject):
+    suggestions_ready = QtCore.pyqtSignal(str)
+
+    # the whole script is tokenized and checked on a worker thread as soon
+    # as it's loaded, and the lines are rechecked as they change. verdicts
+    # are remembered per word across sessions, so the dictionary only ever
+    # sees each word once.
+    def __init__(self, subs_api, opt_api, cache_api):
+        super().__init__()
+        self._subs_api = subs_api
+        self._opt_api = opt_api
+        self._cache_api = cache_api
+        self._provider = None
+        self._generation = 0
+        self._pending = 0
+        self._verdicts = {}
+        self._verdicts_changed = False
+        self._saved_words = set()
+        self._saving = False
+        self._save_timer = QtCore.QTimer(
+            self, singleShot=True, interval=SAVE_DELAY)
+        self._save_timer.timeout.connect(self._save_verdicts)
+        self._ignored = set()
+        self._suggestions = {}
+        self._suggesting = set()
+        self._entries = {}
+        self._word_subs = {}
+        self._misspelt = set()
+        self._changing = None
+        self._error = None
+
+        lines = subs_api.lines
+        lines.items_inserted.connect(self._lines_inserted)
+        lines.items_about_to_be_removed.connect(
+            self._lines_about_to_be_removed)
+        lines.item_about_to_change.connect(self._line_about_to_change)
+        lines.item_changed.connect(self._line_changed)
+        lines.items_changed.connect(self._lines_changed)
+
+    @property
+    def language(self):
+        return self._opt_api.general['spell_check']['language']
+
+    @property
+    def error(self):
+        # the last failure of the worker, if any
+        return self._error
+
+    @property
+    def is_busy(self):
+        return self._pending > 0
+
+    async def wait(self):
+        while self.is_busy:
+            await asyncio.sleep(0.1)
+
+    def get_misspellings(self, sub):
+        # returns (start, end, word) of every misspelt word in the line
+        text, tokens = self._entries.get(sub, (None, None))
+        if text == sub.text and tokens is not None:
+            if sub not in self._misspelt:
+                return []
+        else:
+            # not checked yet; go with whatever verdicts are known so far
+            tokens = _tokenize(sub.text)
+        return [token for token in tokens if self._is_misspelt(token[2])]
+
+    def get_suggestions(self, word):
+        # returns None if they aren't ready yet
+        return self._suggestions.get(word)
+
+    def prefetch_suggestions(self, words):
+        # looking suggestions up is slow, so they're computed ahead on the
+        # worker and remembered. the provider queue is LIFO, so the first
+        # word goes in last and comes out before anything else.
+        words = [
+            word
+            for word in dict.fromkeys(words)
+            if word not in self._suggestions
+            and word not in self._suggesting
+        ]
+        for word in reversed(words):
+            self._suggesting.add(word)
+            self._get_provider().schedule_task(('suggest', word))
+
+    def ignore(self, word):
+        self._ignored.add(word)
+        self._update_word(word)
+
+    def add_to_dictionary(self, word):
+        self._get_provider().schedule_task(('add', word))
+        self._verdicts[word] = True
+        self._saved_words.add(word)
+        self._verdicts_changed = True
+        self._save_timer.start()
+        self._update_word(word)
+
+    def _is_misspelt(self, word):
+        return (
+            not self._verdicts.get(word, True)
+            and word not in self._ignored)
+
+    def _get_provider(self):
+        if self._provider is None:
+            saved_verdicts = self._cache_api.load(self._get_cache_name())
+            self._verdicts.update(saved_verdicts or {})
+            self._saved_words.update(saved_verdicts or {})
+            self._provider = SpellCheckProvider(
+                self, self.language, dict(self._verdicts), self._cache_api)
+            self._provider.finished.connect(self._got_result)
+        return self._provider
+
+    def _get_cache_name(self):
+        return 'spell-check-{}'.format(self.language)
+
+    def _save_verdicts(self):
+        # words that only showed up while a line was being typed, such as
+        # half-written prefixes, aren't worth remembering across sessions
+        if not self._verdicts_changed:
+            return
+        self._keep_current_words()
+        verdicts = {word: self._verdicts[word] for word in self._saved_words}
+        self._verdicts_changed = False
+        self._saving = True
+        self._get_provider().schedule_task(
+            ('save', self._get_cache_name(), verdicts))
+
+    def _keep_current_words(self):
+        self._saved_words.update(
+            word for word in self._word_subs if word in self._verdicts)
+
+    def _schedule(self, subs):
+        provider = self._get_provider()
+        lines = [(sub, sub.text) for sub in subs]
+        chunks = [
+            lines[i:i + CHECK_CHUNK_SIZE]
+            for i in range(0, len(lines), CHECK_CHUNK_SIZE)
+        ]
+        # the provider queue is LIFO, so the first chunk goes in last
+        self._pending += len(chunks)
+        for chunk in reversed(chunks):
+            provider.schedule_task(('check', self._generation, chunk))
+
+    def _got_result(self, result):
+        kind, *args = result
+        if kind == 'error':
+            self._got_error(*args)
+            return
+        if kind == 'save':
+            self._saving = False
+            return
+        if kind == 'suggest':
+            word, suggestions = args
+            self._suggesting.discard(word)
+            self._suggestions[word] = suggestions
+            self.suggestions_ready.emit(word)
+            return
+        if kind != 'check':
+            return
+        generation, lines, new_verdicts = args
+        if generation != self._generation:
+            return
+
+        self._error = None
+        if new_verdicts:
+            self._verdicts.update(new_verdicts)
+            self._verdicts_changed = True
+        for sub, text, tokens in lines:
+            # stale results for lines that were edited or removed meanwhile
+            # are dropped; a newer task is already queued for them
+            if sub in self._entries and sub.text == text:
+                self._set_tokens(sub, text, tokens)
+
+        self._pending -= 1
+        if not self._pending and self._verdicts_changed:
+            self._save_timer.start()
+
+    def _got_error(self, task, error):
+        kind, *args = task
+        if kind == 'save':
+            # try again with the next batch of verdicts
+            self._saving = False
+            self._verdicts_changed = True
+            return
+        self._error = error
+        if kind == 'suggest':
+            word, = args
+            self._suggesting.discard(word)
+            self.suggestions_ready.emit(word)
+        elif kind == 'check':
+            generation, _lines = args
+            if generation == self._generation:
+                self._pending -= 1
+
+    def _set_tokens(self, sub, text, tokens):
+        self._discard(sub)
+        self._entries[sub] = (text, tokens)
+        for _start, _end, word in tokens:
+            self._word_subs.setdefault(word, set()).add(sub)
+        self._update_line(sub)
+
+    def _discard(self, sub):
+        entry = self._entries.pop(sub, None)
+        self._misspelt.discard(sub)
+        if not entry or entry[1] is None:
+            return
+        _text, tokens = entry
+        for _start, _end, word in tokens:
+            subs = self._word_subs.get(word)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._word_subs[word]
+
+    def _update_line(self, sub):
+        _text, tokens = self._entries[sub]
+        if tokens is None:
+            return
+        if any(self._is_misspelt(word) for _start, _end, word in tokens):
+            self._misspelt.add(sub)
+        else:
+            self._misspelt.discard(sub)
+
+    def _update_word(self, word):
+        for sub in self._word_subs.get(word, set()):
+            self._update_line(sub)
+
+    def _check(self, subs):
+        # lines waiting for their results have no tokens yet
+        for sub in subs:
+            self._discard(sub)
+            self._entries[sub] = (sub.text, None)
+        self._schedule(subs)
+
+    def _lines_inserted(self, idx, count):
+        self._check(self._subs_api.lines[idx:idx + count])
+
+    def _lines_about_to_be_removed(self, idx, count):
+        if count == len(self._subs_api.lines):
+            # loading another file; whatever is queued is of no use now
+            self._generation += 1
+            self._pending = 0
+            if self._provider is not None:
+                self._provider.clear_tasks()
+            # queued lookups are gone with the rest; they need to be asked
+            # for again rather than wait forever
+            self._suggesting = set()
+            if self._saving:
+                # the save might have been among the dropped tasks
+                self._saving = False
+                self._verdicts_changed = True
+                self._save_timer.start()
+            self._keep_current_words()
+            self._entries = {}
+            self._word_subs = {}
+            self._misspelt = set()
+        else:
+            for sub in self._subs_api.lines[idx:idx + count]:
+                self._discard(sub)
+
+    def _line_about_to_change(self, idx):
+        # the line might get replaced with another object altogether
+        self._changing = self._subs_api.lines[idx]
+
+    def _line_changed(self, idx):
+        sub = self._subs_api.lines[idx]
+        if self._changing is not None and self._changing is not sub:
+            self._discard(self._changing)
+        self._changing = None
+        self._lines_changed([idx])
+
+    def _lines_changed(self, indexes):
+        subs = [
+            sub
+            for sub in (self._subs_api.lines[idx] for idx in indexes)
+            if self._entries.get(sub, (None, None))[0] != sub.text
+        ]
+        if subs:
+            self._check(subs)
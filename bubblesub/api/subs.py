@@ -1,4 +1,5 @@
 import re
+import bisect
 from pathlib import Path
 import bubblesub.util
 import pysubs2
@@ -135,6 +136,9 @@ class Style(bubblesub.util.ObservableObject):
         self.ssa_style.marginv = self.margin_vertical
         self.ssa_style.encoding = self.encoding
 
+    def _sync(self):
+        self._sync_ssa_style()
+
     def _before_change(self):
         self._old_name = self.name
         self._styles.item_about_to_change.emit(self.name)
@@ -251,6 +255,9 @@ class Subtitle(bubblesub.util.ObservableObject):
         self.ssa_event.marginr = self.margins[2]
         self.ssa_event.type = 'Comment' if self.is_comment else 'Dialogue'
 
+    def _sync(self):
+        self._sync_ssa_event()
+
     def _before_change(self):
         id_ = self.id
         if id_ is not None:
@@ -282,15 +289,45 @@ class SubtitleList(bubblesub.util.ListModel):
             ass_source.append(subtitle.ssa_event)
 
 
+class Vocabulary(bubblesub.util.ListModel):
+    # sorted distinct values along with how many lines use each of them.
+    # values that are no longer used are dropped only on prune(), so that
+    # views don't lose their current item while the user is still typing.
+    def __init__(self):
+        super().__init__()
+        self._counts = {}
+
+    def add(self, value):
+        count = self._counts.get(value)
+        if count is None:
+            self.insert(bisect.bisect_left(self._data, value), [value])
+            count = 0
+        self._counts[value] = count + 1
+
+    def discard(self, value):
+        self._counts[value] -= 1
+
+    def prune(self):
+        for value in [
+                value for value, count in self._counts.items() if not count
+        ]:
+            del self._counts[value]
+            self.remove(bisect.bisect_left(self._data, value), 1)
+
+    def clear(self):
+        self._counts = {}
+        self.remove(0, len(self))
+
+
 class SubtitlesApi(QtCore.QObject):
     loaded = QtCore.pyqtSignal()
     saved = QtCore.pyqtSignal()
-    selection_changed = QtCore.pyqtSignal(list)
+    selection_changed = QtCore.pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
         self._loaded_video_path = None
-        self._selected_indexes = []
+        self._selected_indexes = bubblesub.util.IntervalSet()
         self._ass_source = pysubs2.SSAFile.from_string(
             EMPTY_ASS, format_='ass')
         self._path = None
@@ -298,6 +335,18 @@ class SubtitlesApi(QtCore.QObject):
         self.styles = StyleList()
         self.styles.insert_one('Default')
 
+        # actors and styles used by the lines, for the editor to offer
+        self.actor_vocabulary = Vocabulary()
+        self.style_vocabulary = Vocabulary()
+        self._vocabulary_entries = {}
+        self._changing = None
+        self.lines.items_inserted.connect(self._lines_inserted)
+        self.lines.items_about_to_be_removed.connect(
+            self._lines_about_to_be_removed)
+        self.lines.item_about_to_change.connect(self._line_about_to_change)
+        self.lines.item_changed.connect(self._line_changed)
+        self.lines.items_changed.connect(self._lines_changed)
+
     @property
     def info(self):
         return self._ass_source.info
@@ -338,7 +387,8 @@ class SubtitlesApi(QtCore.QObject):
 
     @selected_indexes.setter
     def selected_indexes(self, new_selection):
-        new_selection = list(sorted(new_selection))
+        # kept as ranges so that selecting thousands of lines stays cheap
+        new_selection = bubblesub.util.IntervalSet(new_selection)
         if new_selection != self._selected_indexes:
             self._selected_indexes = new_selection
             self.selection_changed.emit(new_selection)
@@ -380,3 +430,46 @@ class SubtitlesApi(QtCore.QObject):
             self._ass_source.save(path, header_notice=NOTICE)
             if remember_path:
                 self.saved.emit()
+
+    def _add_to_vocabularies(self, sub):
+        self._vocabulary_entries[sub] = (sub.actor, sub.style)
+        self.actor_vocabulary.add(sub.actor)
+        self.style_vocabulary.add(sub.style)
+
+    def _discard_from_vocabularies(self, sub):
+        entry = self._vocabulary_entries.pop(sub, None)
+        if entry:
+            actor, style = entry
+            self.actor_vocabulary.discard(actor)
+            self.style_vocabulary.discard(style)
+
+    def _lines_inserted(self, idx, count):
+        for sub in self.lines[idx:idx + count]:
+            self._add_to_vocabularies(sub)
+
+    def _lines_about_to_be_removed(self, idx, count):
+        if count == len(self.lines):
+            self._vocabulary_entries = {}
+            self.actor_vocabulary.clear()
+            self.style_vocabulary.clear()
+        else:
+            for sub in self.lines[idx:idx + count]:
+                self._discard_from_vocabularies(sub)
+
+    def _line_about_to_change(self, idx):
+        # the line might get replaced with another object altogether
+        self._changing = self.lines[idx]
+
+    def _line_changed(self, idx):
+        sub = self.lines[idx]
+        if self._changing is not None and self._changing is not sub:
+            self._discard_from_vocabularies(self._changing)
+        self._changing = None
+        self._lines_changed([idx])
+
+    def _lines_changed(self, indexes):
+        for idx in indexes:
+            sub = self.lines[idx]
+            if self._vocabulary_entries.get(sub) != (sub.actor, sub.style):
+                self._discard_from_vocabularies(sub)
+                self._add_to_vocabularies(sub)
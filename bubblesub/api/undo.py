@@ -13,6 +13,7 @@ class UndoOperation(enum.Enum):
     StyleChange = 4
     StylesInsertion = 5
     StylesRemoval = 6
+    SubtitlesChange = 7
 
 
 class UndoBulk:
@@ -83,6 +84,10 @@ class UndoApi(QtCore.QObject):
         elif op_type == UndoOperation.SubtitleChange:
             idx, old_lines, _new_lines = op_args
             self._subs_api.lines[idx] = self._deserialize_lines(old_lines)[0]
+        elif op_type == UndoOperation.SubtitlesChange:
+            indexes, old_values, _new_values = op_args
+            self._subs_api.lines.change_many(
+                dict(zip(indexes, pickle.loads(old_values))))
         elif op_type == UndoOperation.SubtitlesInsertion:
             idx, count, lines = op_args
             self._subs_api.lines.remove(idx, count)
@@ -117,6 +122,10 @@ class UndoApi(QtCore.QObject):
         elif op_type == UndoOperation.SubtitleChange:
             idx, _old_lines, new_lines = op_args
             self._subs_api.lines[idx] = self._deserialize_lines(new_lines)[0]
+        elif op_type == UndoOperation.SubtitlesChange:
+            indexes, _old_values, new_values = op_args
+            self._subs_api.lines.change_many(
+                dict(zip(indexes, pickle.loads(new_values))))
         elif op_type == UndoOperation.SubtitlesInsertion:
             idx, count, lines = op_args
             self._subs_api.lines.insert(idx, self._deserialize_lines(lines))
@@ -150,6 +159,9 @@ class UndoApi(QtCore.QObject):
         self._subs_api.lines.item_changed.connect(self._subtitle_changed)
         self._subs_api.lines.item_about_to_change.connect(
             self._subtitle_about_to_change)
+        self._subs_api.lines.items_changed.connect(self._subtitles_changed)
+        self._subs_api.lines.items_about_to_change.connect(
+            self._subtitles_about_to_change)
         self._subs_api.lines.items_about_to_be_removed.connect(
             self._subtitles_removed)
         self._subs_api.styles.items_inserted.connect(self._styles_inserted)
@@ -165,6 +177,10 @@ class UndoApi(QtCore.QObject):
         self._subs_api.lines.item_changed.disconnect(self._subtitle_changed)
         self._subs_api.lines.item_about_to_change.disconnect(
             self._subtitle_about_to_change)
+        self._subs_api.lines.items_changed.disconnect(
+            self._subtitles_changed)
+        self._subs_api.lines.items_about_to_change.disconnect(
+            self._subtitles_about_to_change)
         self._subs_api.lines.items_about_to_be_removed.disconnect(
             self._subtitles_removed)
         self._subs_api.styles.items_inserted.disconnect(self._styles_inserted)
@@ -197,6 +213,18 @@ class UndoApi(QtCore.QObject):
             self._tmp_state,
             self._serialize_lines(idx, 1))
 
+    def _subtitles_about_to_change(self, indexes):
+        self._tmp_state = self._serialize_values(indexes)
+
+    def _subtitles_changed(self, indexes):
+        # only the changed lines are stored, and only once for the whole
+        # batch
+        self._trim_undo_stack_and_append(
+            UndoOperation.SubtitlesChange,
+            indexes,
+            self._tmp_state,
+            self._serialize_values(indexes))
+
     def _subtitles_inserted(self, idx, count):
         self._trim_undo_stack_and_append(
             UndoOperation.SubtitlesInsertion,
@@ -241,6 +269,12 @@ class UndoApi(QtCore.QObject):
             for item in self._subs_api.lines[idx:idx+count]
         ])
 
+    def _serialize_values(self, indexes):
+        return pickle.dumps([
+            {k: getattr(item, k) for k in item.prop.keys()}
+            for item in (self._subs_api.lines[idx] for idx in indexes)
+        ])
+
     def _deserialize_lines(self, lines):
         return [
             bubblesub.api.subs.Subtitle(self._subs_api.lines, **item)
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+FRAME_DURATION = 20  # ms
+CHUNK_FRAMES = 3000
+
+_SPEECH_BAND = (300, 3400)
+_MIN_SNR = 6  # dB
+_THRESHOLD_RATIO = .3
+_MIN_BAND_RATIO = .4
+_MAX_FLATNESS = .6
+_MAX_ZCR = .35
+_EPSILON = 1e-10
+
+
+def _compute_features(frames, sample_rate):
+    energy = 10 * np.log10(np.mean(np.square(frames), axis=1) + _EPSILON)
+
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    spectrum = np.square(np.abs(np.fft.rfft(frames * window, axis=1)))
+    spectrum += _EPSILON
+    freqs = np.fft.rfftfreq(frames.shape[1], 1 / sample_rate)
+    band = (freqs >= _SPEECH_BAND[0]) & (freqs <= _SPEECH_BAND[1])
+    band_ratio = (
+        np.sum(spectrum[:, band], axis=1) / np.sum(spectrum, axis=1))
+    flatness = (
+        np.exp(np.mean(np.log(spectrum), axis=1))
+        / np.mean(spectrum, axis=1))
+
+    return energy, zcr, band_ratio, flatness
+
+
+def _get_runs(mask):
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _detect_speech_runs(audio_api):
+    # frame-wise energy, zero crossing rate and spectral features are
+    # computed in large vectorised chunks; the energy threshold adapts to
+    # the noise floor of the whole track.
+    sample_rate = audio_api.sample_rate
+    sample_count = audio_api.sample_count
+    frame_size = max(1, sample_rate * FRAME_DURATION // 1000)
+    frame_count = sample_count // frame_size
+    if not frame_count:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    energy = np.empty(frame_count, dtype=np.float32)
+    zcr = np.empty(frame_count, dtype=np.float32)
+    band_ratio = np.empty(frame_count, dtype=np.float32)
+    flatness = np.empty(frame_count, dtype=np.float32)
+
+    for first_frame in range(0, frame_count, CHUNK_FRAMES):
+        chunk_frames = min(CHUNK_FRAMES, frame_count - first_frame)
+        samples = audio_api.get_mono_samples(
+            first_frame * frame_size, chunk_frames * frame_size)
+        samples = samples[:chunk_frames * frame_size]
+        frames = samples.reshape(-1, frame_size)
+        chunk = slice(first_frame, first_frame + len(frames))
+        energy[chunk], zcr[chunk], band_ratio[chunk], flatness[chunk] = (
+            _compute_features(frames, sample_rate))
+
+    noise_floor = np.percentile(energy, 10)
+    speech_level = np.percentile(energy, 95)
+    threshold = max(
+        noise_floor + _MIN_SNR,
+        noise_floor + (speech_level - noise_floor) * _THRESHOLD_RATIO)
+
+    is_speech = (
+        (energy > threshold)
+        & (band_ratio > _MIN_BAND_RATIO)
+        & (flatness < _MAX_FLATNESS)
+        & (zcr < _MAX_ZCR))
+
+    starts, ends = _get_runs(is_speech)
+    return starts * FRAME_DURATION, ends * FRAME_DURATION
+
+
+def detect_speech(audio_api, cache_api, min_gap, min_duration, padding):
+    # decoding and analysing the whole track is what takes time, so the raw
+    # runs are cached per audio source and only the settings are reapplied
+    cache_name = 'speech-{}'.format(cache_api.get_file_key(audio_api.path))
+    runs = cache_api.load_array(cache_name)
+    if runs is None:
+        runs = np.stack(_detect_speech_runs(audio_api))
+        cache_api.save_array(cache_name, runs)
+    starts, ends = np.asarray(runs)
+    if not len(starts):
+        return []
+
+    # merge segments separated by short pauses
+    keep = (starts[1:] - ends[:-1]) >= min_gap
+    starts = starts[np.concatenate([[True], keep])]
+    ends = ends[np.concatenate([keep, [True]])]
+
+    long_enough = (ends - starts) >= min_duration
+    starts = np.maximum(0, starts[long_enough] - padding)
+    ends = ends[long_enough] + padding
+
+    return [(int(start), int(end)) for start, end in zip(starts, ends)]
@@ -3,68 +3,180 @@ import locale
 import atexit
 import tempfile
 from pathlib import Path
-import ffms
 import mpv
+import numpy as np
 import bubblesub.util
+from bubblesub.api.media_index import MediaIndex
 from PyQt5 import QtCore
 
 
+_EMPTY_TIMECODES = np.empty(0, dtype=np.float64)
+_EMPTY_KEYFRAMES = np.empty(0, dtype=np.float64)
+
+_SCENE_FRAME_WIDTH = 64
+_SCENE_MIN_DIFF = 30
+_SCENE_DIFF_FACTOR = 3
+_SCENE_WINDOW = 15
+
+
 class TimecodesProviderContext(bubblesub.util.ProviderContext):
-    def __init__(self, log_api):
+    def __init__(self, log_api, cache_api, media_index):
         super().__init__()
         self._log_api = log_api
+        self._cache_api = cache_api
+        self._media_index = media_index
 
     def work(self, task):
+        ffms = bubblesub.util.get_ffms()
         path = task
         self._log_api.info('video/timecodes: loading... ({})'.format(path))
 
-        path_hash = bubblesub.util.hash(path)
-        cache_name = f'index-{path_hash}-video'
-
-        timecodes = bubblesub.util.load_cache(cache_name)
-        if not timecodes:
-            video = ffms.VideoSource(str(path))
-            timecodes = video.track.timecodes
-            bubblesub.util.save_cache(cache_name, timecodes)
+        cache_name = 'index-{}-timecodes'.format(
+            self._cache_api.get_file_key(path))
+
+        timecodes = self._cache_api.load_array(cache_name)
+        if timecodes is None:
+            index = self._media_index.get(path)
+            if not index:
+                return path, _EMPTY_TIMECODES
+            track_number = index.get_first_indexed_track_of_type(
+                ffms.FFMS_TYPE_VIDEO)
+            video = ffms.VideoSource(str(path), track_number, index)
+            # ffms timecodes are fractional for most containers, rounding
+            # them would misalign seeking
+            timecodes = np.array(video.track.timecodes, dtype=np.float64)
+            self._cache_api.save_array(cache_name, timecodes)
 
         self._log_api.info('video/timecodes: loaded')
         return path, timecodes
 
 
 class TimecodesProvider(bubblesub.util.Provider):
-    def __init__(self, parent, log_api):
-        super().__init__(parent, TimecodesProviderContext(log_api))
+    def __init__(self, parent, log_api, cache_api, media_index):
+        super().__init__(
+            parent, TimecodesProviderContext(log_api, cache_api, media_index))
+
+
+class KeyframesProviderContext(bubblesub.util.ProviderContext):
+    def __init__(self, log_api, cache_api, media_index):
+        super().__init__()
+        self._log_api = log_api
+        self._cache_api = cache_api
+        self._media_index = media_index
+
+    def work(self, task):
+        ffms = bubblesub.util.get_ffms()
+        path, timecodes = task
+        if not len(timecodes):
+            return path, _EMPTY_KEYFRAMES
+
+        cache_name = 'index-{}-keyframes'.format(
+            self._cache_api.get_file_key(path))
+
+        keyframes = self._cache_api.load_array(cache_name)
+        if keyframes is None:
+            index = self._media_index.get(path)
+            if not index:
+                return path, _EMPTY_KEYFRAMES
+            track_number = index.get_first_indexed_track_of_type(
+                ffms.FFMS_TYPE_VIDEO)
+            video = ffms.VideoSource(str(path), track_number, index)
+
+            self._log_api.info('video/keyframes: detecting... ({})'.format(
+                path))
+            frame_indexes = np.array(video.track.keyframes, dtype=np.int64)
+            scene_cuts = self._detect_scene_cuts(path, video)
+            if scene_cuts is None:
+                return path, _EMPTY_KEYFRAMES
+            frame_indexes = np.union1d(frame_indexes, scene_cuts)
+            frame_indexes = frame_indexes[frame_indexes < len(timecodes)]
+            keyframes = np.asarray(timecodes)[frame_indexes]
+            self._cache_api.save_array(cache_name, keyframes)
+            self._log_api.info(
+                'video/keyframes: detected {} keyframes and scene cuts'
+                .format(len(keyframes)))
+
+        return path, keyframes
+
+    def _detect_scene_cuts(self, path, video):
+        # scene cuts are found by comparing consecutive frames downscaled to
+        # grayscale thumbnails; a cut is a difference that is both large on
+        # its own and large compared to the motion around it.
+        ffms = bubblesub.util.get_ffms()
+        first_frame = video.get_frame(0)
+        width = _SCENE_FRAME_WIDTH
+        height = max(1, round(
+            width
+            * first_frame.EncodedHeight
+            / max(1, first_frame.EncodedWidth)))
+        video.set_output_format(
+            [ffms.get_pix_fmt('gray')], width, height, ffms.FFMS_RESIZER_AREA)
+
+        frame_count = video.properties.NumFrames
+        diffs = np.zeros(frame_count, dtype=np.float32)
+        prev_plane = None
+        for frame_idx in range(frame_count):
+            if path != self._media_index.current_path:
+                return None
+            frame = video.get_frame(frame_idx)
+            plane = frame.planes[0][:height * frame.Linesize[0]]
+            plane = plane.reshape(height, -1)[:, :width].astype(np.int16)
+            if prev_plane is not None:
+                diffs[frame_idx] = np.mean(np.abs(plane - prev_plane))
+            prev_plane = plane
+
+        local_avg = np.convolve(
+            diffs, np.ones(_SCENE_WINDOW) / _SCENE_WINDOW, mode='same')
+        is_cut = (
+            (diffs > _SCENE_MIN_DIFF)
+            & (diffs > local_avg * _SCENE_DIFF_FACTOR))
+        return np.flatnonzero(is_cut)
+
+
+class KeyframesProvider(bubblesub.util.Provider):
+    def __init__(self, parent, log_api, cache_api, media_index):
+        super().__init__(
+            parent, KeyframesProviderContext(log_api, cache_api, media_index))
 
 
 class VideoApi(QtCore.QObject):
     loaded = QtCore.pyqtSignal()
     parsed = QtCore.pyqtSignal()
     timecodes_updated = QtCore.pyqtSignal()
+    keyframes_updated = QtCore.pyqtSignal()
     current_pts_changed = QtCore.pyqtSignal()
     max_pts_changed = QtCore.pyqtSignal()
 
-    def __init__(self, subs_api, log_api, opt_api):
+    def __init__(self, subs_api, log_api, opt_api, cache_api):
         super().__init__()
         self._log_api = log_api
         self._subs_api = subs_api
         self._opt_api = opt_api
+        self._cache_api = cache_api
 
         _, self._tmp_subs_path = tempfile.mkstemp(suffix='.ass')
         atexit.register(lambda: os.unlink(self._tmp_subs_path))
 
-        self._timecodes = []
+        self._timecodes = _EMPTY_TIMECODES
+        self._keyframes = _EMPTY_KEYFRAMES
         self._path = None
         self._current_pts = 0
         self._max_pts = 0
         self._mpv_ready = False
         self._need_subs_refresh = False
 
-        self._timecodes_provider = TimecodesProvider(self, log_api)
+        self._media_index = MediaIndex(log_api, cache_api)
+        self._timecodes_provider = TimecodesProvider(
+            self, log_api, cache_api, self._media_index)
         self._timecodes_provider.finished.connect(self._got_timecodes)
+        self._keyframes_provider = KeyframesProvider(
+            self, log_api, cache_api, self._media_index)
+        self._keyframes_provider.finished.connect(self._got_keyframes)
 
         self._subs_api.loaded.connect(self._subs_loaded)
         self._subs_api.selection_changed.connect(self._grid_selection_changed)
         self._subs_api.lines.item_changed.connect(self._subs_changed)
+        self._subs_api.lines.items_changed.connect(self._subs_changed)
         self._subs_api.lines.items_removed.connect(self._subs_changed)
         self._subs_api.lines.items_inserted.connect(self._subs_changed)
         self._subs_api.styles.item_changed.connect(self._subs_changed)
@@ -111,8 +223,12 @@ class VideoApi(QtCore.QObject):
 
     def unload(self):
         self._path = None
-        self._timecodes = []
+        self._media_index.set_current_path(None)
+        self._timecodes = _EMPTY_TIMECODES
         self.timecodes_updated.emit()
+        self._keyframes = _EMPTY_KEYFRAMES
+        self.keyframes_updated.emit()
+        self._keyframes_provider.clear_tasks()
         self.loaded.emit()
         self._reload_video()
 
@@ -121,8 +237,12 @@ class VideoApi(QtCore.QObject):
         self._path = Path(path)
         if str(self._subs_api.remembered_video_path) != str(self._path):
             self._subs_api.remembered_video_path = self._path
-        self._timecodes = []
+        self._timecodes = _EMPTY_TIMECODES
         self.timecodes_updated.emit()
+        self._keyframes = _EMPTY_KEYFRAMES
+        self.keyframes_updated.emit()
+        self._keyframes_provider.clear_tasks()
+        self._media_index.set_current_path(self._path)
         self._timecodes_provider.schedule_task(self._path)
         self._reload_video()
         self.loaded.emit()
@@ -160,7 +280,7 @@ class VideoApi(QtCore.QObject):
             return
         self._set_end(None)  # mpv refuses to seek beyond --end
         pts = max(0, pts)
-        pts = self._align_pts_to_next_frame(pts)
+        pts = self.align_pts_to_next_frame(pts)
         if pts != self.current_pts:
             self._mpv.command(
                 'seek',
@@ -224,11 +344,53 @@ class VideoApi(QtCore.QObject):
     def timecodes(self):
         return self._timecodes
 
+    @property
+    def keyframes(self):
+        return self._keyframes
+
+    @property
+    def media_index(self):
+        return self._media_index
+
+    def frame_idx_from_pts(self, pts):
+        # index of the frame that is displayed at the given pts
+        if not len(self._timecodes):
+            return None
+        idx = np.searchsorted(self._timecodes, pts, side='right') - 1
+        return max(0, int(idx))
+
+    def pts_from_frame_idx(self, idx):
+        if not len(self._timecodes):
+            return None
+        idx = max(0, min(idx, len(self._timecodes) - 1))
+        return float(self._timecodes[idx])
+
+    def align_pts_to_next_frame(self, pts):
+        idx = np.searchsorted(self._timecodes, pts, side='left')
+        if idx < len(self._timecodes):
+            return float(self._timecodes[idx])
+        return pts
+
+    def get_nearest_keyframe(self, pts):
+        # keyframes include scene cuts, so this is what timers snap to
+        idx = np.searchsorted(self._keyframes, pts)
+        candidates = self._keyframes[max(0, idx - 1):idx + 1]
+        if not len(candidates):
+            return None
+        return float(candidates[np.argmin(np.abs(candidates - pts))])
+
     def _got_timecodes(self, result):
         path, timecodes = result
         if path == self.path:
             self._timecodes = timecodes
             self.timecodes_updated.emit()
+            self._keyframes_provider.schedule_task((path, timecodes))
+
+    def _got_keyframes(self, result):
+        path, keyframes = result
+        if path == self.path:
+            self._keyframes = keyframes
+            self.keyframes_updated.emit()
 
     def _play(self, start, end):
         if not self._mpv_ready:
@@ -290,10 +452,3 @@ class VideoApi(QtCore.QObject):
         if len(rows) == 1:
             self.pause()
             self.seek(self._subs_api.lines[rows[0]].start)
-
-    def _align_pts_to_next_frame(self, pts):
-        if self.timecodes:
-            for timecode in self.timecodes:
-                if timecode >= pts:
-                    return timecode
-        return pts
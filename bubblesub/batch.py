@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+from pathlib import Path
+import bubblesub.opt
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog='bubblesub batch',
+        description='Run commands on many subtitle files without the GUI.')
+    parser.add_argument('files', nargs='+', metavar='file')
+    parser.add_argument(
+        '-c', '--command', dest='commands', nargs='+', action='append',
+        required=True, metavar=('name', 'arg'),
+        help='command to run, followed by its arguments; '
+        'arguments are parsed as JSON when possible')
+    parser.add_argument(
+        '-o', '--output-dir',
+        help='where to save the results (default: overwrite the input files)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count(),
+        help='how many files to process in parallel')
+    parser.add_argument('--no-config', action='store_true')
+    return parser.parse_args(args)
+
+
+def _parse_command_arg(arg):
+    try:
+        return json.loads(arg)
+    except ValueError:
+        return arg
+
+
+def _process_file(path, commands, output_path, no_config):
+    from bubblesub.api import Api
+    from bubblesub import cmd as _
+
+    opt = bubblesub.opt.Options()
+    if not no_config:
+        opt.load(opt.DEFAULT_PATH)
+
+    api = Api(opt, headless=True)
+    messages = []
+    api.log.logged.connect(
+        lambda level, text: messages.append(
+            '{}: {}'.format(level.name.lower(), text)))
+
+    if not no_config:
+        api.cmd.load_plugins(opt.location / 'scripts')
+
+    api.subs.load_ass(path)
+    api.subs.selected_indexes = range(len(api.subs.lines))
+
+    loop = asyncio.new_event_loop()
+    try:
+        for name, *args in commands:
+            try:
+                cmd = api.cmd.get(
+                    name, [_parse_command_arg(arg) for arg in args])
+            except KeyError:
+                messages.append('error: unknown command: {}'.format(name))
+                return False, messages
+            if not loop.run_until_complete(api.cmd.execute(cmd)):
+                return False, messages
+    finally:
+        loop.close()
+
+    api.subs.save_ass(output_path)
+    return True, messages
+
+
+def main(args):
+    args = parse_args(args)
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = {}
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, args.jobs)) as executor:
+        for path in args.files:
+            path = Path(path)
+            output_path = output_dir / path.name if args.output_dir else path
+            future = executor.submit(
+                _process_file,
+                path,
+                args.commands,
+                output_path,
+                args.no_config)
+            jobs[future] = path
+
+        failed = 0
+        for future in concurrent.futures.as_completed(jobs):
+            path = jobs[future]
+            try:
+                success, messages = future.result()
+            except Exception as ex:
+                success, messages = False, ['error: {}'.format(ex)]
+            for message in messages:
+                print('{}: {}'.format(path, message), file=sys.stderr)
+            print('{}: {}'.format(path, 'done' if success else 'failed'))
+            if not success:
+                failed += 1
+
+    return 1 if failed else 0
@@ -91,6 +91,92 @@ class AudioSnapSelectionEndToNextSubtitleCommand(CoreCommand):
             self.api.subs.selected_lines[-1].next.start)
 
 
+class AudioSnapSelectionStartToKeyframeCommand(CoreCommand):
+    name = 'audio/snap-sel-start-to-keyframe'
+    menu_name = 'Snap selection start to nearest keyframe'
+
+    def enabled(self):
+        if not self.api.audio.has_selection:
+            return False
+        return len(self.api.video.keyframes) > 0
+
+    async def run(self):
+        pts = self.api.video.get_nearest_keyframe(
+            self.api.audio.selection_start)
+        self.api.audio.select(
+            min(pts, self.api.audio.selection_end),
+            self.api.audio.selection_end)
+
+
+class AudioSnapSelectionEndToKeyframeCommand(CoreCommand):
+    name = 'audio/snap-sel-end-to-keyframe'
+    menu_name = 'Snap selection end to nearest keyframe'
+
+    def enabled(self):
+        if not self.api.audio.has_selection:
+            return False
+        return len(self.api.video.keyframes) > 0
+
+    async def run(self):
+        pts = self.api.video.get_nearest_keyframe(
+            self.api.audio.selection_end)
+        self.api.audio.select(
+            self.api.audio.selection_start,
+            max(pts, self.api.audio.selection_start))
+
+
+class AudioSnapSelectionStartToSilenceCommand(CoreCommand):
+    name = 'audio/snap-sel-start-to-silence'
+
+    def __init__(self, api, window):
+        super().__init__(api)
+        self._window = window
+
+    @property
+    def menu_name(self):
+        return 'Snap selection start to silence (within {} ms)'.format(
+            self._window)
+
+    def enabled(self):
+        return (
+            self.api.audio.has_selection
+            and self.api.audio.envelope is not None)
+
+    async def run(self):
+        start = self.api.audio.selection_start
+        end = self.api.audio.selection_end
+        pts = self.api.audio.envelope.find_quietest_pts(
+            start - self._window, min(end, start + self._window))
+        if pts is not None:
+            self.api.audio.select(round(pts), end)
+
+
+class AudioSnapSelectionEndToSilenceCommand(CoreCommand):
+    name = 'audio/snap-sel-end-to-silence'
+
+    def __init__(self, api, window):
+        super().__init__(api)
+        self._window = window
+
+    @property
+    def menu_name(self):
+        return 'Snap selection end to silence (within {} ms)'.format(
+            self._window)
+
+    def enabled(self):
+        return (
+            self.api.audio.has_selection
+            and self.api.audio.envelope is not None)
+
+    async def run(self):
+        start = self.api.audio.selection_start
+        end = self.api.audio.selection_end
+        pts = self.api.audio.envelope.find_quietest_pts(
+            max(start, end - self._window), end + self._window)
+        if pts is not None:
+            self.api.audio.select(start, round(pts))
+
+
 class AudioShiftSelectionStartCommand(CoreCommand):
     name = 'audio/shift-sel-start'
 
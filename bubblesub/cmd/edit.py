@@ -1,5 +1,10 @@
+import time
+import asyncio
+import bisect
+import itertools
 import bubblesub.ui.util
 from bubblesub.api.cmd import CoreCommand
+from bubblesub.api.vad import detect_speech
 
 
 class EditUndoCommand(CoreCommand):
@@ -308,6 +313,84 @@ class EditSnapSubsEndToNextSubtitleCommand(CoreCommand):
                 sub.end = next_sub.start
 
 
+async def _detect_speech(api):
+    api.log.info('speech detection: analyzing audio...')
+    start_time = time.time()
+    segments = await asyncio.get_event_loop().run_in_executor(
+        None,
+        lambda: detect_speech(
+            api.audio, api.cache, **api.opt.general['speech_detection']))
+    api.log.info(
+        'speech detection: found {} segments in {:.02f} s'.format(
+            len(segments), time.time() - start_time))
+    return segments
+
+
+class EditSnapSubsToSpeechCommand(CoreCommand):
+    name = 'edit/snap-subs-to-speech'
+    menu_name = 'Snap subtitles to detected speech'
+
+    def enabled(self):
+        return self.api.subs.has_selection and self.api.audio.has_audio_source
+
+    async def run(self):
+        segments = await _detect_speech(self.api)
+        starts = [start for start, _end in segments]
+        with self.api.undo.bulk():
+            for sub in self.api.subs.selected_lines:
+                # segments overlapping the subtitle decide its new bounds
+                hi = bisect.bisect_left(starts, sub.end)
+                overlapping = [
+                    (start, end)
+                    for start, end in segments[:hi]
+                    if end > sub.start
+                ]
+                if overlapping:
+                    sub.begin_update()
+                    sub.start = overlapping[0][0]
+                    sub.end = overlapping[-1][1]
+                    sub.end_update()
+
+
+class EditInsertSpeechSegmentsCommand(CoreCommand):
+    name = 'edit/insert-speech-segments'
+    menu_name = 'Insert subtitles for untimed speech'
+
+    def enabled(self):
+        return self.api.audio.has_audio_source
+
+    async def run(self):
+        segments = await _detect_speech(self.api)
+        lines = self.api.subs.lines
+        occupied = sorted(
+            (sub.start, sub.end) for sub in lines if not sub.is_comment)
+        occupied_starts = [start for start, _end in occupied]
+        # furthest end among the subtitles starting up to given position
+        occupied_ends = list(
+            itertools.accumulate((end for _start, end in occupied), max))
+
+        new_segments = []
+        for start, end in segments:
+            hi = bisect.bisect_left(occupied_starts, end)
+            if not hi or occupied_ends[hi - 1] <= start:
+                new_segments.append((start, end))
+        if not new_segments:
+            return
+
+        self.api.gui.begin_update()
+        with self.api.undo.bulk():
+            # going backwards, so each insertion leaves the positions of the
+            # ones still to come intact
+            starts = [sub.start for sub in lines]
+            new_selection = []
+            for start, end in reversed(new_segments):
+                idx = bisect.bisect_right(starts, start)
+                lines.insert_one(idx, start=start, end=end, style='Default')
+                new_selection = [idx] + [i + 1 for i in new_selection]
+            self.api.subs.selected_indexes = new_selection
+        self.api.gui.end_update()
+
+
 class EditShiftSubsStartCommand(CoreCommand):
     name = 'edit/shift-subs-start'
 
@@ -1,6 +1,14 @@
+import re
 import json
+import asyncio
+import threading
+import concurrent.futures
+from pathlib import Path
+import bubblesub.util
 import bubblesub.ui.util
+from bubblesub.api.audio import WAV_FORMATS
 from bubblesub.api.cmd import CoreCommand
+from PyQt5 import QtCore
 from PyQt5 import QtWidgets
 
 
@@ -104,7 +112,7 @@ class GridSelectAllCommand(CoreCommand):
         return len(self.api.subs.lines) > 0
 
     async def run(self):
-        self.api.subs.selected_indexes = list(range(len(self.api.subs.lines)))
+        self.api.subs.selected_indexes = range(len(self.api.subs.lines))
 
 
 class GridSelectNothingCommand(CoreCommand):
@@ -229,12 +237,27 @@ class PasteFromClipboardAboveCommand(CoreCommand):
 
 class SaveAudioSampleCommand(CoreCommand):
     name = 'grid/create-audio-sample'
-    menu_name = 'Create audio sample...'
+
+    def __init__(self, api, fmt=None):
+        super().__init__(api)
+        self._fmt = fmt
+
+    @property
+    def menu_name(self):
+        if self._fmt is None:
+            return 'Create audio sample...'
+        return 'Create audio sample ({})...'.format(self._fmt)
 
     def enabled(self):
         return self.api.subs.has_selection and self.api.audio.has_audio_source
 
     async def run(self):
+        if self._fmt is not None and self._fmt not in WAV_FORMATS:
+            self.error(
+                'unknown sample format: {} (expected one of: {})'.format(
+                    self._fmt, ', '.join(WAV_FORMATS)))
+            return
+
         async def run_dialog(_api, main_window):
             return bubblesub.ui.util.save_dialog(
                 main_window, 'Waveform Audio File (*.wav)')
@@ -243,4 +266,92 @@ class SaveAudioSampleCommand(CoreCommand):
         if path:
             start_pts = self.api.subs.selected_lines[0].start
             end_pts = self.api.subs.selected_lines[-1].end
-            self.api.audio.save_wav(path, start_pts, end_pts)
+            self.api.audio.save_wav(path, start_pts, end_pts, self._fmt)
+
+
+class ExportAudioClipsCommand(CoreCommand):
+    name = 'grid/export-audio-clips'
+    menu_name = 'Export audio clip per line...'
+
+    def enabled(self):
+        return self.api.subs.has_selection and self.api.audio.has_audio_source
+
+    async def run(self):
+        async def run_dialog(_api, main_window):
+            return bubblesub.ui.util.directory_dialog(main_window)
+
+        directory = await self.api.gui.exec(run_dialog)
+        if not directory:
+            return
+
+        template = self.api.opt.general['audio']['clip_name_template']
+        jobs = []
+        for sub in self.api.subs.selected_lines:
+            file_name = template.format(
+                number=sub.number,
+                start=sub.start,
+                end=sub.end,
+                style=sub.style,
+                actor=sub.actor,
+                text=bubblesub.util.ass_to_plaintext(sub.text)[:50])
+            file_name = re.sub(r'[\\/:*?"<>|\n]', '_', file_name)
+            jobs.append((Path(directory) / file_name, sub.start, sub.end))
+
+        await self.api.gui.exec(self._export, jobs)
+
+    async def _export(self, api, main_window, jobs):
+        cancelled = threading.Event()
+        dialog = QtWidgets.QProgressDialog(
+            'Exporting audio clips...', 'Cancel', 0, len(jobs), main_window)
+        dialog.setWindowModality(QtCore.Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.canceled.connect(cancelled.set)
+
+        def export(job):
+            if cancelled.is_set():
+                return
+            path, start_pts, end_pts = job
+            api.audio.save_wav(str(path), start_pts, end_pts)
+
+        # the audio sources are per thread, so every worker decodes with
+        # its own decoder
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=api.opt.general['audio']['clip_export_workers'])
+        futures = [executor.submit(export, job) for job in jobs]
+        pending = {asyncio.wrap_future(future) for future in futures}
+        done_count = 0
+        error_count = 0
+        try:
+            while pending and not cancelled.is_set():
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        api.log.error(
+                            'audio clip export: {}'.format(future.exception()))
+                        error_count += 1
+                done_count += len(done)
+                dialog.setValue(done_count)
+        finally:
+            # jobs that haven't started yet are dropped, but the ones that
+            # are running are waited for so that nothing keeps writing once
+            # the command is done
+            for future in futures:
+                future.cancel()
+            await asyncio.get_event_loop().run_in_executor(
+                None, executor.shutdown)
+            for result in await asyncio.gather(
+                    *pending, return_exceptions=True):
+                if isinstance(result, asyncio.CancelledError):
+                    continue
+                if isinstance(result, Exception):
+                    api.log.error('audio clip export: {}'.format(result))
+                    error_count += 1
+            dialog.close()
+
+        if cancelled.is_set():
+            api.log.info('audio clip export: cancelled')
+        else:
+            api.log.info(
+                'audio clip export: saved {} clips to {}'.format(
+                    done_count - error_count, jobs[0][0].parent))
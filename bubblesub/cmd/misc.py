@@ -1,3 +1,5 @@
+import json
+import bubblesub.ui.util
 from bubblesub.api.cmd import CoreCommand
 
 
@@ -8,3 +10,105 @@ class ResetPluginsCommand(CoreCommand):
     async def run(self):
         if self.api.opt.location:
             self.api.cmd.load_plugins(self.api.opt.location / 'scripts')
+
+
+class CacheStatsCommand(CoreCommand):
+    name = 'misc/cache-stats'
+    menu_name = 'Show cache statistics'
+
+    async def run(self):
+        self.info('{} files, {:.1f} MiB used out of {:.1f} MiB ({})'.format(
+            self.api.cache.file_count,
+            self.api.cache.size / (1024 * 1024),
+            self.api.cache.max_size / (1024 * 1024),
+            self.api.cache.location))
+
+
+class PurgeCacheCommand(CoreCommand):
+    name = 'misc/purge-cache'
+    menu_name = 'Purge cache'
+
+    async def run(self):
+        size = self.api.cache.size
+        self.api.cache.purge()
+        self.info('purged {:.1f} MiB'.format(size / (1024 * 1024)))
+
+
+class CommandMetricsCommand(CoreCommand):
+    name = 'misc/command-metrics'
+    menu_name = 'Show command metrics'
+
+    async def run(self):
+        metrics = sorted(
+            self.api.cmd.metrics.items(),
+            key=lambda item: item[1].total_time,
+            reverse=True)
+        if not metrics:
+            self.info('no commands ran yet')
+        for name, entry in metrics:
+            self.info(
+                '{}: {} runs, {} errors, '
+                'avg {:.03f} s, max {:.03f} s, total {:.02f} s'.format(
+                    name,
+                    entry.run_count,
+                    entry.error_count,
+                    entry.average_time,
+                    entry.max_time,
+                    entry.total_time))
+
+
+class ExportCommandMetricsCommand(CoreCommand):
+    name = 'misc/export-command-metrics'
+    menu_name = 'Export command metrics...'
+
+    async def run(self):
+        async def run_dialog(_api, main_window):
+            return bubblesub.ui.util.save_dialog(
+                main_window, 'JSON file (*.json)',
+                file_name='command-metrics.json')
+
+        path = await self.api.gui.exec(run_dialog)
+        if path:
+            with open(path, 'w') as handle:
+                json.dump(
+                    {
+                        name: entry.to_dict()
+                        for name, entry in self.api.cmd.metrics.items()
+                    },
+                    handle,
+                    indent=4)
+            self.info('saved to {}'.format(path))
+
+
+class ProfileCommandsCommand(CoreCommand):
+    name = 'misc/profile-commands'
+
+    def __init__(self, api, count=1, pattern=None):
+        super().__init__(api)
+        self._count = count
+        self._pattern = pattern
+
+    @property
+    def menu_name(self):
+        if self._pattern is not None:
+            return 'Profile commands matching {}'.format(self._pattern)
+        return 'Profile next {} command{}'.format(
+            self._count, 's' if self._count > 1 else '')
+
+    async def run(self):
+        self.api.cmd.start_profiling(self._count, self._pattern)
+        if self._pattern is not None:
+            self.info('profiling commands matching {}'.format(self._pattern))
+        else:
+            self.info('profiling next {} commands'.format(self._count))
+
+
+class StopProfilingCommand(CoreCommand):
+    name = 'misc/stop-profiling'
+    menu_name = 'Stop profiling commands'
+
+    def enabled(self):
+        return self.api.cmd.is_profiling
+
+    async def run(self):
+        self.api.cmd.stop_profiling()
@@ -1,7 +1,10 @@
 import re
-import enum
+import time
 import bubblesub.ui.util
 from bubblesub.api.cmd import CoreCommand
+from bubblesub.api.rules import RuleSet
+from bubblesub.api.search import SearchMode
+from bubblesub.api.search import get_subject_attr
 from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
@@ -10,43 +13,8 @@ from PyQt5 import QtWidgets
 MAX_HISTORY_ENTRIES = 25
 
 
-class SearchMode(enum.IntEnum):
-    Text = 1
-    Note = 2
-    Actor = 3
-    Style = 4
-
-
-def _create_search_regex(text, case_sensitive, use_regexes):
-    return re.compile(
-        text if use_regexes else re.escape(text),
-        flags=(0 if case_sensitive else re.I))
-
-
 def _get_subject_text_by_mode(sub, mode):
-    if mode == SearchMode.Text:
-        return sub.text
-    elif mode == SearchMode.Note:
-        return sub.note
-    elif mode == SearchMode.Actor:
-        return sub.actor
-    elif mode == SearchMode.Style:
-        return sub.style
-    else:
-        assert False, 'Invalid mode'
-
-
-def _set_subject_text_by_mode(sub, mode, value):
-    if mode == SearchMode.Text:
-        sub.text = value
-    elif mode == SearchMode.Note:
-        sub.note = value
-    elif mode == SearchMode.Actor:
-        sub.actor = value
-    elif mode == SearchMode.Style:
-        sub.style = value
-    else:
-        assert False, 'Invalid mode'
+    return getattr(sub, get_subject_attr(mode))
 
 
 def _get_subject_widget_by_mode(main_window, mode):
@@ -138,9 +106,12 @@ def _search(api, main_window, regex, mode, direction):
             for i in range(num_lines)
         )
 
+    candidates = api.search.get_candidate_indexes(regex, mode)
     for idx in iterator:
+        if candidates is not None and idx not in candidates:
+            continue
         subject = _get_subject_text_by_mode(api.subs.lines[idx], mode)
-        matches = list(re.finditer(regex, subject))
+        matches = list(regex.finditer(subject))
         if not matches:
             continue
 
@@ -172,28 +143,65 @@ def _replace_selection(main_window, new_text, mode):
 
 
 def _replace_all(api, regex, new_text, mode):
-    with api.undo.bulk():
-        count = 0
-        for sub in api.subs.lines:
-            old_subject_text = _get_subject_text_by_mode(sub, mode)
-            new_subject_text = re.sub(regex, new_text, old_subject_text)
-            if old_subject_text != new_subject_text:
-                _set_subject_text_by_mode(sub, mode, new_subject_text)
-                count += len(re.findall(regex, old_subject_text))
-        if count:
-            api.subs.selected_indexes = []
-        return count
+    # one pass over all the lines; the changes are applied as a single batch
+    # that notifies the observers once and takes one undo entry
+    start_time = time.time()
+    attr = get_subject_attr(mode)
+    changes = {}
+    count = 0
+    candidates = api.search.get_candidate_indexes(regex, mode)
+    if candidates is None:
+        candidates = range(len(api.subs.lines))
+    for idx in sorted(candidates):
+        old_subject_text = getattr(api.subs.lines[idx], attr)
+        new_subject_text, sub_count = regex.subn(new_text, old_subject_text)
+        if old_subject_text != new_subject_text:
+            changes[idx] = {attr: new_subject_text}
+            count += sub_count
+    if count:
+        api.subs.lines.change_many(changes)
+        api.subs.selected_indexes = []
+    api.log.info(
+        'search: replaced {} occurences in {} lines in {:.02f} s'.format(
+            count, len(changes), time.time() - start_time))
+    return count
+
+
+def _replace_with_rules(api, rule_set, indexes):
+    start_time = time.time()
+    changes = {}
+    count = 0
+    for idx in indexes:
+        old_text = api.subs.lines[idx].text
+        new_text, sub_count = rule_set.apply(old_text)
+        if old_text != new_text:
+            changes[idx] = {'text': new_text}
+            count += sub_count
+    api.subs.lines.change_many(changes)
+    api.log.info(
+        'search: applied {} rules, replaced {} occurences in {} lines '
+        'in {:.02f} s'.format(
+            len(rule_set.rules),
+            count,
+            len(changes),
+            time.time() - start_time))
+    return count
 
 
 def _count(api, regex, mode):
     count = 0
-    for sub in api.subs.lines:
-        subject_text = _get_subject_text_by_mode(sub, mode)
-        count += len(re.findall(regex, subject_text))
+    candidates = api.search.get_candidate_indexes(regex, mode)
+    if candidates is None:
+        candidates = range(len(api.subs.lines))
+    for idx in candidates:
+        subject_text = _get_subject_text_by_mode(api.subs.lines[idx], mode)
+        count += len(regex.findall(subject_text))
     return count
 
 
 class SearchModeGroupBox(QtWidgets.QGroupBox):
+    changed = QtCore.pyqtSignal()
+
     def __init__(self, parent):
         super().__init__('Search mode:', parent)
         self._radio_buttons = {
@@ -205,6 +213,7 @@ class SearchModeGroupBox(QtWidgets.QGroupBox):
         layout = QtWidgets.QVBoxLayout(self)
         for radio_button in self._radio_buttons.values():
             layout.addWidget(radio_button)
+            radio_button.toggled.connect(lambda _checked: self.changed.emit())
         self._radio_buttons[SearchMode.Text].setChecked(True)
 
     def set_value(self, value):
@@ -250,6 +259,7 @@ class SearchDialog(QtWidgets.QDialog):
         self.find_next_btn = strip.addButton('Find next', strip.ActionRole)
         self.find_prev_btn = strip.addButton('Find previous', strip.ActionRole)
         self.count_btn = strip.addButton('Count occurences', strip.ActionRole)
+        self.find_all_btn = strip.addButton('Find all', strip.ActionRole)
         self.replace_sel_btn = strip.addButton(
             'Replace selection', strip.ActionRole)
         self.replace_all_btn = strip.addButton('Replace all', strip.ActionRole)
@@ -278,12 +288,46 @@ class SearchDialog(QtWidgets.QDialog):
             self.replace_sel_btn.hide()
             self.replace_all_btn.hide()
 
+        self.results_label = QtWidgets.QLabel(self)
+        self.results_list = QtWidgets.QListWidget(self)
+        self.results_list.setMinimumWidth(300)
+        self.results_list.itemClicked.connect(self._result_clicked)
+        self.results_box = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(self.results_box)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.results_label)
+        layout.addWidget(self.results_list)
+        self.results_box.hide()
+
         layout = QtWidgets.QHBoxLayout(self, spacing=24)
         layout.addWidget(settings_box)
         layout.addWidget(strip)
+        layout.addWidget(self.results_box)
+
+        self.search_text_edit.editTextChanged.connect(self._query_changed)
+        self.case_chkbox.toggled.connect(self._query_changed)
+        self.regex_chkbox.toggled.connect(self._query_changed)
+        self.search_mode_group_box.changed.connect(self._query_changed)
+        api.search.found.connect(self._results_found)
+        api.search.find_all_finished.connect(self._find_all_finished)
+        api.subs.lines.items_inserted.connect(self._lines_changed)
+        api.subs.lines.items_removed.connect(self._lines_changed)
+        api.subs.lines.item_changed.connect(self._lines_changed)
+        api.subs.lines.items_changed.connect(self._lines_changed)
 
         self.search_text_edit.lineEdit().selectAll()
 
+    def done(self, *args):
+        self._api.search.cancel_find_all()
+        self._api.search.found.disconnect(self._results_found)
+        self._api.search.find_all_finished.disconnect(
+            self._find_all_finished)
+        self._api.subs.lines.items_inserted.disconnect(self._lines_changed)
+        self._api.subs.lines.items_removed.disconnect(self._lines_changed)
+        self._api.subs.lines.item_changed.disconnect(self._lines_changed)
+        self._api.subs.lines.items_changed.disconnect(self._lines_changed)
+        return super().done(*args)
+
     def reject(self, *args):
         self._save_opt()
         return super().reject(*args)
@@ -300,6 +344,8 @@ class SearchDialog(QtWidgets.QDialog):
             self._search(1)
         elif sender == self.count_btn:
             self._count()
+        elif sender == self.find_all_btn:
+            self._find_all()
 
     def _replace_selection(self):
         _replace_selection(self._main_window, self._target_text, self._mode)
@@ -335,6 +381,60 @@ class SearchDialog(QtWidgets.QDialog):
         bubblesub.ui.util.notice(
             f'Found {count} occurences.' if count else 'No occurences found.')
 
+    def _find_all(self):
+        self._push_search_history()
+        self.results_list.clear()
+        self.results_label.setText('Searching...')
+        self.results_box.show()
+        try:
+            regex = self._search_regex
+        except re.error as ex:
+            self.results_label.setText('Invalid pattern: {}'.format(ex))
+            return
+        self._api.search.find_all(regex, self._mode)
+
+    def _query_changed(self, *_args):
+        if self._api.search.is_finding_all:
+            self._api.search.cancel_find_all()
+            self.results_label.setText(
+                'Cancelled, {} matches so far'.format(
+                    self.results_list.count()))
+
+    def _lines_changed(self, *_args):
+        # the results point at line indexes and offsets within them, which
+        # any edit can invalidate
+        if self._api.search.is_finding_all or self.results_list.count():
+            self._api.search.cancel_find_all()
+            self.results_list.clear()
+            self.results_label.setText(
+                'Subtitles have changed, search again.')
+
+    def _results_found(self, hits):
+        for idx, start, end, snippet in hits:
+            item = QtWidgets.QListWidgetItem(
+                '#{}: {}'.format(idx + 1, snippet.replace('\n', ' ')))
+            item.setData(QtCore.Qt.UserRole, (idx, start, end, self._mode))
+            self.results_list.addItem(item)
+        self.results_label.setText(
+            'Searching... {} matches'.format(self.results_list.count()))
+
+    def _find_all_finished(self):
+        count = self.results_list.count()
+        self.results_label.setText(
+            'Found {} matches'.format(count) if count else
+            'No occurences found.')
+
+    def _result_clicked(self, item):
+        idx, start, end, mode = item.data(QtCore.Qt.UserRole)
+        if idx >= len(self._api.subs.lines):
+            return
+        self._api.subs.selected_indexes = [idx]
+        _select_text_on_widget(
+            _get_subject_widget_by_mode(self._main_window, mode),
+            start,
+            end)
+        self._update_replacement_enabled()
+
     def _update_replacement_enabled(self):
         mode = self._mode
         subject_widget = _get_subject_widget_by_mode(self._main_window, mode)
@@ -392,8 +492,8 @@ class SearchDialog(QtWidgets.QDialog):
 
     @property
     def _search_regex(self):
-        return _create_search_regex(
-            self._text, self._use_regexes, self._case_sensitive)
+        return self._api.search.compile(
+            self._text, self._case_sensitive, self._use_regexes)
 
 
 class SearchCommand(CoreCommand):
@@ -438,7 +538,7 @@ class SearchRepeatCommand(CoreCommand):
             result = _search(
                 api,
                 main_window,
-                _create_search_regex(
+                api.search.compile(
                     opt['history'][0],
                     opt['case_sensitive'],
                     opt['use_regexes']),
@@ -448,3 +548,40 @@ class SearchRepeatCommand(CoreCommand):
                 bubblesub.ui.util.notice('No occurences found.')
 
         await self.api.gui.exec(run)
+
+
+class ReplaceWithRulesCommand(CoreCommand):
+    name = 'edit/replace-with-rules'
+    menu_name = 'Replace with rules...'
+
+    def __init__(self, api, path=None):
+        super().__init__(api)
+        self._path = path
+
+    def enabled(self):
+        return self.api.subs.has_selection
+
+    async def run(self):
+        async def run(api, main_window):
+            return bubblesub.ui.util.load_dialog(
+                main_window, 'Replacement rules (*.json)')
+
+        path = self._path or await self.api.gui.exec(run)
+        if not path:
+            self.info('cancelled')
+            return
+
+        try:
+            rule_set = RuleSet.load(path)
+        except (OSError, ValueError, TypeError, re.error) as ex:
+            self.error('failed to load rules from {}: {}'.format(path, ex))
+            return
+
+        try:
+            count = _replace_with_rules(
+                self.api, rule_set, self.api.subs.selected_indexes)
+        except (re.error, IndexError) as ex:
+            # bad group references in regex replacements
+            self.error('failed to apply rules from {}: {}'.format(path, ex))
+            return
+        self.info('replaced {} occurences'.format(count))
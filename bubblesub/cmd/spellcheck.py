@@ -1,30 +1,24 @@
+import itertools
 import bubblesub.util
 import bubblesub.ui.util
 from bubblesub.api.cmd import CoreCommand
-from enchant import Dict
 from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
 
-def _match_words(api):
-    import regex
-    for sub in api.subs.selected_lines:
-        text = regex.sub(
-            r'\\[Nnh]',
-            '  ',  # two spaces so that matches mantain position in text
-            sub.text)
-        for match in regex.finditer(r'\p{L}[\p{L}\p{P}]*\p{L}|\p{L}', text):
-            yield (sub.id, match)
+SUGGESTION_PREFETCH_COUNT = 5
 
 
 class SpellCheckDialog(QtWidgets.QDialog):
-    def __init__(self, api, main_window, word_matches):
+    def __init__(self, api, main_window):
         super().__init__(main_window)
         self._main_window = main_window
         self._api = api
-        self._word_matches = list(word_matches)
-        self._dict = Dict('en_US')
+        self._indexes = list(api.subs.selected_indexes)
+        self._position = (0, 0)
+        self._current = None
+        api.spell.suggestions_ready.connect(self._suggestions_ready)
 
         self._mispelt_text_edit = QtWidgets.QLineEdit(self, readOnly=True)
         self._replacement_text_edit = QtWidgets.QLineEdit(self)
@@ -59,6 +53,10 @@ class SpellCheckDialog(QtWidgets.QDialog):
         if self._next():
             self.exec_()
 
+    def done(self, *args):
+        self._api.spell.suggestions_ready.disconnect(self._suggestions_ready)
+        return super().done(*args)
+
     def action(self, sender):
         if sender == self.replace_btn:
             self._replace()
@@ -70,58 +68,81 @@ class SpellCheckDialog(QtWidgets.QDialog):
             self._ignore_all()
 
     def _replace(self):
-        edit = self._main_window.editor.center.text_edit
-        text = edit.toPlainText()
-        text = (
-            text[:edit.textCursor().selectionStart()] +
-            self._replacement_text_edit.text() +
-            text[edit.textCursor().selectionEnd():])
-        edit.document().setPlainText(text)
+        idx, start, end, _word = self._current
+        replacement = self._replacement_text_edit.text()
+        sub = self._api.subs.lines[idx]
+        sub.text = sub.text[:start] + replacement + sub.text[end:]
+        self._position = (self._position[0], start + len(replacement))
         self._next()
 
     def _add_to_dictionary(self):
-        self._dict.add(self._mispelt_text_edit.text())
+        self._api.spell.add_to_dictionary(self._current[3])
         self._next()
 
     def _ignore(self):
+        self._position = (self._position[0], self._current[2])
         self._next()
 
     def _ignore_all(self):
-        self._dict.add_to_session(self._mispelt_text_edit.text())
+        self._api.spell.ignore(self._current[3])
         self._next()
 
     def _next(self):
-        idx, match = self._iter_to_next_mispelt_match()
-        if match:
-            self._focus_match(idx, match)
+        matches = self._iter_misspellings()
+        self._current = next(matches, None)
+        if self._current:
+            self._api.spell.prefetch_suggestions(
+                [self._current[3]] + [
+                    word
+                    for _idx, _start, _end, word
+                    in itertools.islice(matches, SUGGESTION_PREFETCH_COUNT)
+                ])
+            self._focus_match(*self._current)
             return True
         bubblesub.ui.util.notice('No more results.')
         self.reject()
         return False
 
-    def _iter_to_next_mispelt_match(self):
-        while len(self._word_matches):
-            idx, match = self._word_matches.pop(0)
-            if not self._dict.check(match.group(0)):
-                return idx, match
-        return None, None
-
-    def _focus_match(self, idx, match):
+    def _iter_misspellings(self):
+        # the lines are already checked, so the ones without errors are
+        # skipped right away. the position follows the first match only.
+        line_pos, char_pos = self._position
+        first = True
+        while line_pos < len(self._indexes):
+            idx = self._indexes[line_pos]
+            sub = self._api.subs.lines.get(idx)
+            if sub is not None:
+                for start, end, word in self._api.spell.get_misspellings(sub):
+                    if start >= char_pos:
+                        if first:
+                            self._position = (line_pos, start)
+                            first = False
+                        yield idx, start, end, word
+            line_pos += 1
+            char_pos = 0
+
+    def _focus_match(self, idx, start, end, word):
         self._api.subs.selected_indexes = [idx]
 
         cursor = self._main_window.editor.center.text_edit.textCursor()
-        cursor.setPosition(match.start())
-        cursor.setPosition(match.end(), QtGui.QTextCursor.KeepAnchor)
+        cursor.setPosition(start)
+        cursor.setPosition(end, QtGui.QTextCursor.KeepAnchor)
         self._main_window.editor.center.text_edit.setTextCursor(cursor)
 
-        self._mispelt_text_edit.setText(match.group(0))
+        self._mispelt_text_edit.setText(word)
+        self._show_suggestions(word)
 
+    def _show_suggestions(self, word):
         self._suggestions_list_view.model().clear()
-        for suggestion in self._dict.suggest(match.group(0)):
+        for suggestion in self._api.spell.get_suggestions(word) or []:
             item = QtGui.QStandardItem(suggestion)
             item.setEditable(False)
             self._suggestions_list_view.model().appendRow(item)
 
+    def _suggestions_ready(self, word):
+        if self._current and self._current[3] == word:
+            self._show_suggestions(word)
+
     def _suggestion_clicked(self, event):
         self._replacement_text_edit.setText(event.data())
 
@@ -131,12 +152,17 @@ class EditSpellCheckCommand(CoreCommand):
     menu_name = 'Spell check...'
 
     def enabled(self):
-        return self.api.subs.has_selection
+        return self.api.spell is not None and self.api.subs.has_selection
 
     async def run(self):
-        word_matches = _match_words(self.api)
+        if self.api.spell.is_busy:
+            self.info('waiting for the background check to finish...')
+            await self.api.spell.wait()
+        if self.api.spell.error:
+            self.error('spell check failed: {}'.format(self.api.spell.error))
+            return
 
         async def run(api, main_window):
-            SpellCheckDialog(api, main_window, word_matches)
+            SpellCheckDialog(api, main_window)
 
         await self.api.gui.exec(run)
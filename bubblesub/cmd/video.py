@@ -1,6 +1,5 @@
 import os
 import re
-import bisect
 import bubblesub.ui.util
 from bubblesub.api.cmd import CoreCommand
 
@@ -117,11 +116,12 @@ class VideoStepFrameCommand(CoreCommand):
         elif self._delta == -1:
             self.api.video.step_frame_backward()
         else:
-            current_pts = self.api.video.current_pts
-            idx = bisect.bisect_left(self.api.video.timecodes, current_pts)
+            idx = self.api.video.frame_idx_from_pts(
+                self.api.video.current_pts)
             if idx + self._delta not in range(len(self.api.video.timecodes)):
                 return
-            self.api.video.seek(self.api.video.timecodes[idx + self._delta])
+            self.api.video.seek(
+                self.api.video.pts_from_frame_idx(idx + self._delta))
 
 
 class VideoStepMillisecondsCommand(CoreCommand):
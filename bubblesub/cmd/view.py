@@ -20,6 +20,32 @@ class ViewSetPaletteCommand(CoreCommand):
         await self.api.gui.exec(run)
 
 
+class ViewSetAudioPreviewModeCommand(CoreCommand):
+    name = 'view/set-audio-preview-mode'
+
+    def __init__(self, api, mode):
+        super().__init__(api)
+        self._mode = mode
+
+    @property
+    def menu_name(self):
+        return 'Show audio as {}'.format(self._mode)
+
+    async def run(self):
+        # the audio widget pulls in numpy and the spectrogram
+        from bubblesub.ui.audio import PreviewMode
+        try:
+            mode = PreviewMode(self._mode)
+        except ValueError:
+            self.error('unknown audio preview mode: {}'.format(self._mode))
+            return
+
+        async def run(_api, main_window):
+            main_window.audio.preview.mode = mode
+
+        await self.api.gui.exec(run)
+
+
 class ViewFocusTextEditorCommand(CoreCommand):
     name = 'view/focus-text-editor'
     menu_name = 'Focus text editor'
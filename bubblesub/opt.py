@@ -19,6 +19,17 @@ _DEFAULT_GENERAL = {
     'audio': {
         'spectrogram_resolution': 10,
         'spectrogram_sync_interval': 65,
+        'preview_mode': 'spectrogram',
+        'clip_name_template': '{number:04d}_{start}-{end}.wav',
+        'clip_export_workers': 4,
+    },
+    'cache': {
+        'max_size': 2048,
+    },
+    'speech_detection': {
+        'min_gap': 300,
+        'min_duration': 250,
+        'padding': 100,
     },
     'grid': {
         'columns': [
@@ -39,6 +50,9 @@ _DEFAULT_GENERAL = {
         'use_regexes': False,
         'mode': 1,
     },
+    'spell_check': {
+        'language': 'en_US',
+    },
 
     'current_palette': 'light',
     'palettes': {
@@ -222,6 +236,7 @@ _DEFAULT_TOP_MENU = [
         None,
         ['edit/search'],
         ['edit/search-and-replace'],
+        ['edit/replace-with-rules'],
         ['edit/search-repeat', 1],
         ['edit/search-repeat', -1],
         None,
@@ -238,6 +253,9 @@ _DEFAULT_TOP_MENU = [
         ['edit/join-subs/keep-first'],
         ['edit/join-subs/concatenate'],
         None,
+        ['edit/snap-subs-to-speech'],
+        ['edit/insert-speech-segments'],
+        None,
         ['grid/copy-text-to-clipboard'],
         ['grid/copy-times-to-clipboard'],
         ['grid/paste-times-from-clipboard'],
@@ -253,7 +271,11 @@ _DEFAULT_TOP_MENU = [
         ['view/set-palette', 'light'],
         ['view/set-palette', 'dark'],
         None,
+        ['view/set-audio-preview-mode', 'spectrogram'],
+        ['view/set-audio-preview-mode', 'waveform'],
+        None,
         ['grid/create-audio-sample'],
+        ['grid/export-audio-clips'],
         ['video/screenshot', False],
         ['video/screenshot', True],
         None,
@@ -297,6 +319,16 @@ _DEFAULT_TOP_MENU = [
             ['audio/snap-sel-end-to-video'],
             ['audio/snap-sel-to-video'],
         ]],
+        ['Snap selection to keyframes', [
+            ['audio/snap-sel-start-to-keyframe'],
+            ['audio/snap-sel-end-to-keyframe'],
+        ]],
+        ['Snap selection to silence', [
+            ['audio/snap-sel-start-to-silence', 250],
+            ['audio/snap-sel-end-to-silence', 250],
+            ['audio/snap-sel-start-to-silence', 1000],
+            ['audio/snap-sel-end-to-silence', 1000],
+        ]],
         ['Shift selection', [
             ['audio/shift-sel-start', -250],
             ['audio/shift-sel-start', 250],
@@ -314,6 +346,18 @@ _DEFAULT_TOP_MENU = [
         ['audio/scroll', -1],
         ['audio/scroll', 1],
     ]],
+
+    ['&Misc', [
+        ['misc/cache-stats'],
+        ['misc/purge-cache'],
+        None,
+        ['misc/command-metrics'],
+        ['misc/export-command-metrics'],
+        None,
+        ['misc/profile-commands', 1],
+        ['misc/profile-commands', 10],
+        ['misc/stop-profiling'],
+    ]],
 ]
 
 _DEFAULT_CONTEXT_MENU = [
@@ -1 +0,0 @@
-from bubblesub.ui.ui import run
@@ -11,6 +11,11 @@ NOT_CACHED = object()
 CACHING = object()
 
 
+class PreviewMode(enum.Enum):
+    Spectrogram = 'spectrogram'
+    Waveform = 'waveform'
+
+
 class DragMode(enum.Enum):
     Off = 0
     SelectionStart = 1
@@ -31,6 +36,7 @@ class BaseAudioWidget(QtWidgets.QWidget):
         api.subs.lines.items_inserted.connect(upd)
         api.subs.lines.items_removed.connect(upd)
         api.subs.lines.item_changed.connect(upd)
+        api.subs.lines.items_changed.connect(upd)
 
     def wheelEvent(self, event):
         if event.modifiers() & QtCore.Qt.ControlModifier:
@@ -129,6 +135,19 @@ class AudioPreviewWidget(BaseAudioWidget):
         api.video.current_pts_changed.connect(self._video_current_pts_changed)
         api.video.loaded.connect(self._video_loaded)
         api.audio.view_changed.connect(self._audio_view_changed)
+        api.audio.envelope_updated.connect(self._envelope_updated)
+
+    @property
+    def mode(self):
+        return PreviewMode(self._api.opt.general['audio']['preview_mode'])
+
+    @mode.setter
+    def mode(self, value):
+        self._api.opt.general['audio']['preview_mode'] = value.value
+        if value == PreviewMode.Waveform:
+            # nothing is going to draw the columns that are still queued
+            self._cancel_spectrum()
+        self.update()
 
     def changeEvent(self, _event):
         self._generate_color_table()
@@ -136,7 +155,10 @@ class AudioPreviewWidget(BaseAudioWidget):
     def paintEvent(self, _event):
         painter = QtGui.QPainter()
         painter.begin(self)
-        self._draw_spectrogram(painter, _event)
+        if self.mode == PreviewMode.Waveform:
+            self._draw_waveform(painter)
+        else:
+            self._draw_spectrogram(painter, _event)
         painter.end()
 
         painter = QtGui.QPainter()
@@ -195,6 +217,9 @@ class AudioPreviewWidget(BaseAudioWidget):
             self.update()
 
     def _audio_view_changed(self):
+        self._cancel_spectrum()
+
+    def _cancel_spectrum(self):
         self._spectrum_cache = {
             key: value
             for key, value in self._spectrum_cache.items()
@@ -210,6 +235,9 @@ class AudioPreviewWidget(BaseAudioWidget):
     def _video_current_pts_changed(self):
         self._need_repaint = True
 
+    def _envelope_updated(self):
+        self._need_repaint = True
+
     def _spectrum_updated(self, result):
         pts, column = result
         self._spectrum_cache[pts] = column
@@ -248,6 +276,38 @@ class AudioPreviewWidget(BaseAudioWidget):
         painter.scale(1, self.height() / (height - 1))
         painter.drawPixmap(0, 0, QtGui.QPixmap.fromImage(image))
 
+    def _draw_waveform(self, painter):
+        envelope = self._api.audio.envelope
+        if not envelope or not self._api.audio.view_size:
+            return
+
+        width = self.width()
+        height = self.height()
+        mins, maxs, rms = envelope.get_columns(
+            self._api.audio.view_start, self._api.audio.view_end, width)
+
+        center = height / 2
+        rows = np.arange(height).reshape(-1, 1)
+        peak_mask = (
+            (rows >= center - maxs * center)
+            & (rows <= center - mins * center))
+        rms_mask = (
+            (rows >= center - rms * center)
+            & (rows <= center + rms * center))
+
+        pixels = np.zeros([height, width], dtype=np.uint8)
+        pixels[peak_mask] = 160
+        pixels[peak_mask & rms_mask] = 255
+
+        image = QtGui.QImage(
+            pixels.data,
+            pixels.shape[1],
+            pixels.shape[0],
+            pixels.strides[0],
+            QtGui.QImage.Format_Indexed8)
+        image.setColorTable(self._color_table)
+        painter.drawPixmap(0, 0, QtGui.QPixmap.fromImage(image))
+
     def _draw_subtitle_rects(self, painter):
         h = self.height()
         color = get_color(self._api, 'spectrogram/subtitle')
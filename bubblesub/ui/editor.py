@@ -1,4 +1,6 @@
+import functools
 import bubblesub.util
+from bubblesub.ui.vocabulary_model import VocabularyModel
 from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
@@ -129,10 +131,15 @@ class Editor(QtWidgets.QWidget):
 
         self._index = None
         self._api = api
+        self._vocabulary_text = {}
 
         self.top_bar = TopBar(self)
         self.center = CenterBar(api, self)
         self.bottom_bar = BottomBar(self)
+        self._bind_vocabulary(
+            self.bottom_bar.actor_edit, api.subs.actor_vocabulary)
+        self._bind_vocabulary(
+            self.bottom_bar.style_edit, api.subs.style_vocabulary)
 
         layout = QtWidgets.QVBoxLayout(self)
         layout.setSpacing(4)
@@ -145,6 +152,27 @@ class Editor(QtWidgets.QWidget):
         self._connect_api_signals()
         self._connect_ui_signals()
 
+    def _bind_vocabulary(self, combo_box, vocabulary):
+        # the combo box resets its text whenever rows come and go, which
+        # would otherwise get pushed into the selected line
+        combo_box.setModel(VocabularyModel(vocabulary, self))
+        begin = functools.partial(self._vocabulary_about_to_change, combo_box)
+        end = functools.partial(self._vocabulary_changed, combo_box)
+        vocabulary.items_about_to_be_inserted.connect(begin)
+        vocabulary.items_about_to_be_removed.connect(begin)
+        vocabulary.items_inserted.connect(end)
+        vocabulary.items_removed.connect(end)
+
+    def _vocabulary_about_to_change(self, combo_box, _idx, _count):
+        self._vocabulary_text[combo_box] = combo_box.currentText()
+        combo_box.blockSignals(True)
+
+    def _vocabulary_changed(self, combo_box, _idx, _count):
+        text = self._vocabulary_text.pop(combo_box)
+        if combo_box.currentText() != text:
+            combo_box.setEditText(text)
+        combo_box.blockSignals(False)
+
     def _fetch_selection(self, index):
         self._index = index
         subtitle = self._api.subs.lines[index]
@@ -158,14 +186,9 @@ class Editor(QtWidgets.QWidget):
         self.top_bar.margin_v_edit.setValue(subtitle.margins[1])
         self.top_bar.margin_r_edit.setValue(subtitle.margins[2])
 
-        self.bottom_bar.actor_edit.clear()
-        self.bottom_bar.actor_edit.addItems(
-            sorted(list(set(sub.actor for sub in self._api.subs.lines))))
+        self._api.subs.actor_vocabulary.prune()
+        self._api.subs.style_vocabulary.prune()
         self.bottom_bar.actor_edit.lineEdit().setText(subtitle.actor)
-
-        self.bottom_bar.style_edit.clear()
-        self.bottom_bar.style_edit.addItems(
-            sorted(list(set(sub.style for sub in self._api.subs.lines))))
         self.bottom_bar.style_edit.lineEdit().setText(subtitle.style)
 
         self.center.text_edit.document().setPlainText(
@@ -233,6 +256,10 @@ class Editor(QtWidgets.QWidget):
             self._fetch_selection(self._index)
             self._connect_ui_signals()
 
+    def _items_changed(self, indexes):
+        if self._index in indexes:
+            self._item_changed(self._index)
+
     def _time_end_edited(self):
         self._disconnect_ui_signals()
         start = self.top_bar.start_time_edit.get_value()
@@ -256,10 +283,12 @@ class Editor(QtWidgets.QWidget):
 
     def _connect_api_signals(self):
         self._api.subs.lines.item_changed.connect(self._item_changed)
+        self._api.subs.lines.items_changed.connect(self._items_changed)
         self._api.subs.selection_changed.connect(self._grid_selection_changed)
 
     def _disconnect_api_signals(self):
         self._api.subs.lines.item_changed.disconnect(self._item_changed)
+        self._api.subs.lines.items_changed.disconnect(self._items_changed)
         self._api.subs.selection_changed.disconnect(
             self._grid_selection_changed)
 
@@ -1,25 +1,71 @@
-import ffms
+import threading
 import bubblesub.util
 import numpy as np
-import pyfftw
 
 
 DERIVATION_SIZE = 10
 DERIVATION_DISTANCE = 6
 
+_WISDOM_CACHE_NAME = 'fftw-wisdom'
+
+
+class FftPlanner:
+    # measuring is what makes planning slow, but its results (the wisdom)
+    # survive restarts in the cache. plans aren't safe to execute from
+    # several threads at once, so every worker keeps a planner of its own.
+    _lock = threading.Lock()
+
+    def __init__(self, cache_api):
+        self._cache_api = cache_api
+        self._wisdom = None
+        self._plans = {}
+
+    def get_plan(self, size):
+        import pyfftw
+        if size not in self._plans:
+            self._load_wisdom()
+            input_ = pyfftw.empty_aligned(size, dtype=np.float32)
+            output = pyfftw.empty_aligned(size // 2 + 1, dtype=np.complex64)
+            self._plans[size] = pyfftw.FFTW(
+                input_, output, flags=('FFTW_MEASURE',))
+            self._save_wisdom()
+        return self._plans[size]
+
+    def _load_wisdom(self):
+        import pyfftw
+        with self._lock:
+            if self._wisdom is None:
+                self._wisdom = self._cache_api.load(_WISDOM_CACHE_NAME) or ()
+                if self._wisdom:
+                    pyfftw.import_wisdom(self._wisdom)
+
+    def _save_wisdom(self):
+        import pyfftw
+        with self._lock:
+            wisdom = pyfftw.export_wisdom()
+            if wisdom != self._wisdom:
+                self._wisdom = wisdom
+                self._cache_api.save(_WISDOM_CACHE_NAME, wisdom)
+
 
 class SpectrumProviderContext(bubblesub.util.ProviderContext):
     def __init__(self, api):
         super().__init__()
         self._api = api
-        self._input = pyfftw.empty_aligned(
-            2 << DERIVATION_SIZE, dtype=np.float32)
-        self._output = pyfftw.empty_aligned(
-            (1 << DERIVATION_SIZE) + 1, dtype=np.complex64)
-        self._fftw = pyfftw.FFTW(
-            self._input, self._output, flags=('FFTW_MEASURE',))
+        self._planner = FftPlanner(api.cache)
+        self._input = None
+        self._output = None
+        self._fftw = None
+
+    def start_work(self):
+        # planning takes a while, so it happens on the worker thread rather
+        # than when the widget is created
+        self._fftw = self._planner.get_plan(2 << DERIVATION_SIZE)
+        self._input = self._fftw.input_array
+        self._output = self._fftw.output_array
 
     def work(self, task):
+        ffms = bubblesub.util.get_ffms()
         pts = task
 
         audio_frame = int(pts * self._api.audio.sample_rate / 1000.0)
@@ -27,6 +27,10 @@ class StatusBar(QtWidgets.QStatusBar):
         api.video.current_pts_changed.connect(self._video_current_pts_changed)
         api.audio.selection_changed.connect(self._audio_selection_changed)
         api.subs.selection_changed.connect(self._subs_selection_changed)
+        api.video.media_index.indexing_progressed.connect(
+            self._indexing_progressed)
+        api.video.media_index.indexing_finished.connect(
+            self._indexing_finished)
 
     def _subs_selection_changed(self):
         count = len(self._api.subs.selected_indexes)
@@ -42,26 +46,29 @@ class StatusBar(QtWidgets.QStatusBar):
             def format_range(low, high):
                 return f'{low}..{high}' if low != high else str(low)
 
-            ranges = []
-            for idx in self._api.subs.selected_indexes:
-                if ranges and ranges[-1][1] == idx - 1:
-                    ranges[-1] = (ranges[-1][0], idx)
-                else:
-                    ranges.append((idx, idx))
-
             self._subs_label.setText(
                 'Subtitles: {}/{} ({}, {:.1%})'.format(
                     ','.join(
-                        format_range(low + 1, high + 1)
-                        for low, high in ranges),
+                        format_range(start + 1, stop)
+                        for start, stop
+                        in self._api.subs.selected_indexes.ranges),
                     total,
                     count,
                     count / total))
 
 
+    def _indexing_progressed(self, percent):
+        self.showMessage(f'Indexing media: {percent}%')
+
+    def _indexing_finished(self):
+        self.clearMessage()
+
     def _video_current_pts_changed(self):
+        frame_idx = self._api.video.frame_idx_from_pts(
+            self._api.video.current_pts)
         self._video_frame_label.setText(
-            'Video frame: {} ({:.1%})'.format(
+            'Video frame: {} ({}, {:.1%})'.format(
+                '-' if frame_idx is None else frame_idx + 1,
                 bubblesub.util.ms_to_str(self._api.video.current_pts),
                 self._api.video.current_pts / max(1, self._api.video.max_pts)))
 
@@ -1,3 +1,4 @@
+import bubblesub.util
 import bubblesub.ui.util
 from bubblesub.ui.subs_model import SubsModel, SubsModelColumn
 from PyQt5 import QtCore
@@ -40,10 +41,10 @@ class SubsGrid(QtWidgets.QTableView):
         self.menu.exec_(self.viewport().mapToGlobal(position))
 
     def _collect_rows(self):
-        rows = set()
-        for index in self.selectionModel().selectedIndexes():
-            rows.add(index.row())
-        return list(rows)
+        # whole row spans rather than every selected cell
+        return bubblesub.util.IntervalSet.from_ranges(
+            (selection_range.top(), selection_range.bottom() + 1)
+            for selection_range in self.selectionModel().selection())
 
     def _subs_loaded(self):
         self.scrollTo(
@@ -51,10 +52,11 @@ class SubsGrid(QtWidgets.QTableView):
             self.EnsureVisible | self.PositionAtTop)
 
     def _widget_selection_changed(self, _selected, _deselected):
-        if self._collect_rows() != self._api.subs.selected_indexes:
+        rows = self._collect_rows()
+        if rows != self._api.subs.selected_indexes:
             self._api.subs.selection_changed.disconnect(
                 self._api_selection_changed)
-            self._api.subs.selected_indexes = self._collect_rows()
+            self._api.subs.selected_indexes = rows
             self._api.subs.selection_changed.connect(
                 self._api_selection_changed)
 
@@ -66,9 +68,10 @@ class SubsGrid(QtWidgets.QTableView):
             self._widget_selection_changed)
 
         selection = QtCore.QItemSelection()
-        for row in self._api.subs.selected_indexes:
-            idx = self.model().index(row, 0)
-            selection.select(idx, idx)
+        for start, stop in self._api.subs.selected_indexes.ranges:
+            selection.select(
+                self.model().index(start, 0),
+                self.model().index(stop - 1, 0))
 
         self.selectionModel().clear()
 
@@ -43,6 +43,7 @@ class SubsModel(QtCore.QAbstractTableModel):
 
         self._subtitles = api.subs.lines
         self._subtitles.item_changed.connect(self._proxy_data_changed)
+        self._subtitles.items_changed.connect(self._proxy_items_changed)
         self._subtitles.items_inserted.connect(self._proxy_items_inserted)
         self._subtitles.items_removed.connect(self._proxy_items_removed)
         self._cache = []
@@ -170,6 +171,14 @@ class SubsModel(QtCore.QAbstractTableModel):
                 self.index(idx, i),
                 [QtCore.Qt.DisplayRole, QtCore.Qt.BackgroundRole])
 
+    def _proxy_items_changed(self, indexes):
+        for idx in indexes:
+            self._cache[idx] = [None, None]
+        self.dataChanged.emit(
+            self.index(indexes[0], 0),
+            self.index(indexes[-1], self.columnCount() - 1),
+            [QtCore.Qt.DisplayRole, QtCore.Qt.BackgroundRole])
+
     def _proxy_items_inserted(self, idx, count):
         self.reset_cache()
         if count:
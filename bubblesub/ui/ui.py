@@ -1,33 +1,66 @@
 import asyncio
+import json
 import sys
 import bubblesub.ui.main_window
 import bubblesub.ui.util
 import quamash
+from PyQt5 import QtCore
 from PyQt5 import QtWidgets
 
 
-def run(api, args):
+class _FirstPaintFilter(QtCore.QObject):
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self._callback = callback
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint:
+            obj.removeEventFilter(self)
+            self._callback()
+        return False
+
+
+def run(api, args, timer):
     app = QtWidgets.QApplication(sys.argv)
     loop = quamash.QEventLoop(app)
     asyncio.set_event_loop(loop)
+    timer.mark('creating application')
 
     if not args.no_config:
         api.opt.load(api.opt.DEFAULT_PATH)
+        timer.mark('loading config')
 
     main_window = bubblesub.ui.main_window.MainWindow(api)
     api.gui.set_main_window(main_window)
+    timer.mark('creating main window')
 
     if not args.no_config:
         try:
             api.cmd.load_plugins(api.opt.location / 'scripts')
         except Exception as ex:
             api.log.error(str(ex))
+        timer.mark('loading plugins')
+
+    def first_paint():
+        timer.mark('first paint')
+        print('time to first paint: {:.02f} s'.format(timer.total))
+        if args.startup_report:
+            with open(args.startup_report, 'w') as handle:
+                json.dump(timer.report(), handle, indent=4)
+        if args.quit_after_startup:
+            # going through the window shuts everything down the usual way
+            loop.call_soon(main_window.close)
+
+    main_window.installEventFilter(_FirstPaintFilter(first_paint, app))
 
     api.video.start()
     main_window.show()
+    timer.mark('showing window')
+    print('time to window: {:.02f} s'.format(timer.total))
 
     if args.file:
         api.subs.load_ass(args.file)
+        timer.mark('loading subtitles')
 
     with loop:
         loop.run_forever()
@@ -202,6 +202,12 @@ def save_dialog(parent, filter, directory=None, file_name=None):
     return path
 
 
+def directory_dialog(parent, directory=None):
+    return QtWidgets.QFileDialog.getExistingDirectory(
+        parent,
+        directory=directory or QtCore.QDir.homePath())
+
+
 def time_jump_dialog(
         parent,
         value=0,
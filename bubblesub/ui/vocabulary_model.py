@@ -0,0 +1,38 @@
+from PyQt5 import QtCore
+
+
+class VocabularyModel(QtCore.QAbstractListModel):
+    def __init__(self, vocabulary, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._vocabulary = vocabulary
+        self._vocabulary.items_about_to_be_inserted.connect(
+            self._proxy_items_about_to_be_inserted)
+        self._vocabulary.items_inserted.connect(self._proxy_items_inserted)
+        self._vocabulary.items_about_to_be_removed.connect(
+            self._proxy_items_about_to_be_removed)
+        self._vocabulary.items_removed.connect(self._proxy_items_removed)
+
+    def rowCount(self, _parent=QtCore.QModelIndex()):
+        return len(self._vocabulary)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole or role == QtCore.Qt.EditRole:
+            return self._vocabulary[index.row()]
+        return QtCore.QVariant()
+
+    def _proxy_items_about_to_be_inserted(self, idx, count):
+        if count:
+            self.beginInsertRows(QtCore.QModelIndex(), idx, idx + count - 1)
+
+    def _proxy_items_inserted(self, idx, count):
+        if count:
+            self.endInsertRows()
+
+    def _proxy_items_about_to_be_removed(self, idx, count):
+        if count:
+            self.beginRemoveRows(QtCore.QModelIndex(), idx, idx + count - 1)
+
+    def _proxy_items_removed(self, idx, count):
+        if count:
+            self.endRemoveRows()
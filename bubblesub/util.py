@@ -1,15 +1,13 @@
 import re
 import sys
+import bisect
+import itertools
 import time
-import pickle
 import queue
 import traceback
-import hashlib
 from numbers import Number
-from collections import Set, Mapping, deque
-from pathlib import Path
+from collections import Set, Mapping, Sequence, deque
 from PyQt5 import QtCore
-import xdg
 import pysubs2.time
 
 
@@ -45,6 +43,13 @@ def character_count(text):
     return len(re.sub(r'\W+', '', ass_to_plaintext(text), flags=re.I | re.U))
 
 
+def get_ffms():
+    # ffms takes a while to load and is only needed once media is opened,
+    # so everything goes through here rather than importing it up front
+    import ffms
+    return ffms
+
+
 def ms_to_str(milliseconds):
     return pysubs2.time.ms_to_str(milliseconds, fractions=True)
 
@@ -70,29 +75,6 @@ def str_to_ms(text):
     raise ValueError('Invalid time')
 
 
-def get_cache_file_path(cache_name):
-    return Path(xdg.XDG_CACHE_HOME) / 'bubblesub' / (cache_name + '.dat')
-
-
-def hash(path):
-    return hashlib.md5(str(path).encode('utf-8')).hexdigest()
-
-
-def load_cache(cache_name):
-    cache_file = get_cache_file_path(cache_name)
-    if cache_file.exists():
-        with cache_file.open(mode='rb') as handle:
-            return pickle.load(handle)
-    return None
-
-
-def save_cache(cache_name, data):
-    cache_file = get_cache_file_path(cache_name)
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    with cache_file.open(mode='wb') as handle:
-        pickle.dump(data, handle)
-
-
 class Benchmark:
     def __init__(self, msg):
         self._msg = msg
@@ -112,6 +94,29 @@ class Benchmark:
         self._time = time.time()
 
 
+class PhaseTimer:
+    def __init__(self):
+        self._start_time = time.time()
+        self._last_time = self._start_time
+        self.phases = []
+
+    def mark(self, name):
+        # records how long it took since the previous mark
+        now = time.time()
+        self.phases.append((name, now - self._last_time))
+        self._last_time = now
+
+    @property
+    def total(self):
+        return self._last_time - self._start_time
+
+    def report(self):
+        return {
+            'phases': {name: duration for name, duration in self.phases},
+            'total': self.total,
+        }
+
+
 class ObservableProperty:
     def __init__(self, attr):
         self.attr = attr
@@ -166,6 +171,19 @@ class ObservableObject:
             self._after_change()
             self._dirty = False
 
+    def set_quietly(self, **kwargs):
+        # changes the properties without notifying anyone; the caller is
+        # responsible for notifying the observers. it can be called within
+        # begin_update/end_update, so whatever state it finds is kept.
+        throttled, dirty = self._throttled, self._dirty
+        self._throttled = True
+        try:
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+        finally:
+            self._throttled, self._dirty = throttled, dirty
+        self._sync()
+
     def notify_before_property_change(self):
         if not self._throttled:
             self._before_change()
@@ -181,15 +199,124 @@ class ObservableObject:
     def _after_change(self):
         pass
 
+    def _sync(self):
+        pass
+
+
+class IntervalSet(Sequence):
+    # sorted set of integers stored as disjoint [start, stop) ranges; acts
+    # as a sorted sequence of the integers, but long runs cost next to
+    # nothing
+    def __init__(self, values=()):
+        if isinstance(values, IntervalSet):
+            ranges = values.ranges
+        elif isinstance(values, range) and values.step == 1:
+            ranges = IntervalSet.from_ranges(
+                [(values.start, values.stop)]).ranges
+        else:
+            ranges = []
+            for value in sorted(set(values)):
+                if ranges and ranges[-1][1] == value:
+                    ranges[-1] = (ranges[-1][0], value + 1)
+                else:
+                    ranges.append((value, value + 1))
+        self._set_ranges(ranges)
+
+    @staticmethod
+    def from_ranges(ranges):
+        # ranges may overlap or touch each other
+        merged = []
+        for start, stop in sorted(ranges):
+            if start >= stop:
+                continue
+            if merged and merged[-1][1] >= start:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+        result = IntervalSet()
+        result._set_ranges(merged)
+        return result
+
+    @property
+    def ranges(self):
+        return list(zip(self._starts, self._stops))
+
+    def _set_ranges(self, ranges):
+        self._starts = [start for start, _stop in ranges]
+        self._stops = [stop for _start, stop in ranges]
+        # offsets[i] tells how many values precede the i-th range
+        self._offsets = [0]
+        for start, stop in ranges:
+            self._offsets.append(self._offsets[-1] + stop - start)
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self._slice(idx)
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError('IntervalSet index out of range')
+        range_idx = bisect.bisect_right(self._offsets, idx) - 1
+        return self._starts[range_idx] + idx - self._offsets[range_idx]
+
+    def _slice(self, idx):
+        # contiguous slices are cut out of the ranges directly
+        start, stop, step = idx.indices(len(self))
+        if step != 1:
+            return list(self)[idx]
+        if start >= stop:
+            return IntervalSet()
+        first = bisect.bisect_right(self._offsets, start) - 1
+        last = bisect.bisect_right(self._offsets, stop - 1) - 1
+        ranges = []
+        for range_idx in range(first, last + 1):
+            offset = self._offsets[range_idx]
+            range_start = self._starts[range_idx]
+            ranges.append((
+                range_start + max(0, start - offset),
+                range_start + min(
+                    self._stops[range_idx] - range_start, stop - offset)))
+        result = IntervalSet()
+        result._set_ranges(ranges)
+        return result
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            range(start, stop) for start, stop in self.ranges)
+
+    def __reversed__(self):
+        return itertools.chain.from_iterable(
+            reversed(range(start, stop))
+            for start, stop in reversed(self.ranges))
+
+    def __contains__(self, value):
+        range_idx = bisect.bisect_right(self._starts, value) - 1
+        return range_idx >= 0 and value < self._stops[range_idx]
+
+    def __eq__(self, other):
+        if isinstance(other, IntervalSet):
+            return (
+                self._starts == other._starts
+                and self._stops == other._stops)
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return 'IntervalSet({!r})'.format(self.ranges)
+
 
 # alternative to QtCore.QAbstractListModel that simplifies indexing
 class ListModel(QtCore.QObject):
     items_inserted = QtCore.pyqtSignal([int, int])
     items_removed = QtCore.pyqtSignal([int, int])
     item_changed = QtCore.pyqtSignal([int])
+    items_changed = QtCore.pyqtSignal([list])
     items_about_to_be_inserted = QtCore.pyqtSignal([int, int])
     items_about_to_be_removed = QtCore.pyqtSignal([int, int])
     item_about_to_change = QtCore.pyqtSignal([int])
+    items_about_to_change = QtCore.pyqtSignal([list])
 
     def __init__(self):
         super().__init__()
@@ -205,6 +332,7 @@ class ListModel(QtCore.QObject):
         if isinstance(idx, slice):
             raise RuntimeError('Slice assignment is not supported')
         else:
+            self.item_about_to_change.emit(idx)
             self._data[idx] = value
             self.item_changed.emit(idx)
 
@@ -226,6 +354,18 @@ class ListModel(QtCore.QObject):
         self._data = self._data[:idx] + data + self._data[idx:]
         self.items_inserted.emit(idx, len(data))
 
+    def change_many(self, changes):
+        # changes is a dictionary of item indexes to the new property values;
+        # observers are notified once for all the items rather than for each
+        # of them separately
+        if not changes:
+            return
+        indexes = sorted(changes)
+        self.items_about_to_change.emit(indexes)
+        for idx in indexes:
+            self._data[idx].set_quietly(**changes[idx])
+        self.items_changed.emit(indexes)
+
     def remove(self, idx, count):
         self.items_about_to_be_removed.emit(idx, count)
         self._data = self._data[:idx] + self._data[idx + count:]
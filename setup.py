@@ -18,7 +18,6 @@ setup(
     install_requires=[
         'ffms',
         'numpy',
-        'scipy',
         'pysubs2',
         'pyfftw',
         'PyQT5',
@@ -0,0 +1,74 @@
+import pytest
+from bubblesub.util import IntervalSet
+
+
+def test_values_are_merged_into_ranges():
+    interval_set = IntervalSet([5, 1, 2, 3, 3, 7, 6])
+    assert interval_set.ranges == [(1, 4), (5, 8)]
+    assert len(interval_set) == 6
+
+
+def test_range_fast_path():
+    assert IntervalSet(range(3, 7)).ranges == [(3, 7)]
+    assert IntervalSet(range(7, 3)).ranges == []
+    assert IntervalSet(range(0, 6, 2)).ranges == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_adjacent_ranges_are_merged():
+    interval_set = IntervalSet.from_ranges([(4, 6), (0, 2), (2, 4)])
+    assert interval_set.ranges == [(0, 6)]
+
+
+def test_overlapping_ranges_are_merged():
+    interval_set = IntervalSet.from_ranges([(0, 5), (3, 8), (4, 6), (10, 12)])
+    assert interval_set.ranges == [(0, 8), (10, 12)]
+    assert len(interval_set) == 10
+
+
+def test_empty_ranges_are_dropped():
+    interval_set = IntervalSet.from_ranges([(3, 3), (5, 2), (6, 7)])
+    assert interval_set.ranges == [(6, 7)]
+    assert len(interval_set) == 1
+    assert not IntervalSet.from_ranges([(1, 1)])
+
+
+def test_iteration():
+    interval_set = IntervalSet.from_ranges([(0, 2), (5, 7)])
+    assert list(interval_set) == [0, 1, 5, 6]
+    assert list(reversed(interval_set)) == [6, 5, 1, 0]
+    assert list(IntervalSet()) == []
+
+
+def test_indexing():
+    interval_set = IntervalSet.from_ranges([(0, 2), (5, 7)])
+    assert [interval_set[i] for i in range(4)] == [0, 1, 5, 6]
+    assert interval_set[-1] == 6
+    assert interval_set[-4] == 0
+    with pytest.raises(IndexError):
+        interval_set[4]
+    with pytest.raises(IndexError):
+        interval_set[-5]
+
+
+def test_membership():
+    interval_set = IntervalSet.from_ranges([(0, 2), (5, 7)])
+    assert [value in interval_set for value in range(-1, 8)] == [
+        False, True, True, False, False, False, True, True, False,
+    ]
+
+
+def test_slicing_removes_values_outside_of_the_slice():
+    interval_set = IntervalSet.from_ranges([(0, 3), (5, 8), (10, 11)])
+    assert interval_set[1:5].ranges == [(1, 3), (5, 7)]
+    assert interval_set[3:].ranges == [(5, 8), (10, 11)]
+    assert interval_set[:-1].ranges == [(0, 3), (5, 8)]
+    assert interval_set[4:4].ranges == []
+    assert interval_set[::3] == [0, 5, 10]
+    assert interval_set[::-1] == [10, 7, 6, 5, 2, 1, 0]
+
+
+def test_equality():
+    interval_set = IntervalSet([1, 2, 4])
+    assert interval_set == IntervalSet.from_ranges([(1, 3), (4, 5)])
+    assert interval_set == [1, 2, 4]
+    assert interval_set != IntervalSet([1, 2])
@@ -0,0 +1,39 @@
+from bubblesub.api.rules import Rule, RuleSet
+
+
+def test_literal_rules():
+    rule_set = RuleSet([
+        Rule('he', 'HE'),
+        Rule('hers', 'HERS'),
+        Rule('she', 'SHE'),
+    ])
+    assert rule_set.apply('ushers he') == ('uSHErs HE', 2)
+
+
+def test_case_insensitive_literal_replacement_is_not_a_template():
+    rule_set = RuleSet([
+        Rule('path', r'C:\path', case_sensitive=False),
+    ])
+    assert rule_set.apply('PATH') == (r'C:\path', 1)
+
+
+def test_regex_replacement_is_a_template():
+    rule_set = RuleSet([Rule(r'(\d+)x', r'\1 times', regex=True)])
+    assert rule_set.apply('3x') == ('3 times', 1)
+
+
+def test_global_inline_flags():
+    rule_set = RuleSet([
+        Rule('(?i)foo', 'bar', regex=True),
+        Rule('baz', 'qux', regex=True),
+    ])
+    assert rule_set.apply('FOO baz') == ('bar qux', 2)
+
+
+def test_invalid_rule_is_reported_by_name():
+    try:
+        RuleSet([Rule('(', '', regex=True, name='broken')])
+    except ValueError as ex:
+        assert 'broken' in str(ex)
+    else:
+        assert False